@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Compare storage encodings of WeathEasy variables.
+
+Reads a sample chunk of every stored variable and reports its compression
+ratio, encoding and decoding speed and the maximum relative error for the zarr
+default encoding and the one configured in `weatheasy.const`:
+
+    python3 benchmarks/codecs.py -d STORE [--latitude LAT] [--longitude LON]
+"""
+
+from __future__ import annotations
+
+from time import perf_counter
+from typing import TYPE_CHECKING, NamedTuple
+
+import numpy as np
+import zarr
+
+from weatheasy import const
+from weatheasy.util import encoding_kwargs, get_storage, init_parser
+
+
+if TYPE_CHECKING:
+    from numcodecs.abc import Codec
+    from numpy.typing import NDArray
+
+    from weatheasy.const import BoundingBox
+
+
+class Result(NamedTuple):
+    ratio: float
+    encode_speed: float
+    decode_speed: float
+    max_error: float
+
+
+def main() -> None:
+    parser = init_parser('codecs')
+    parser.add_argument('--latitude', type=float, default=55.75222, help='sample chunk latitude')
+    parser.add_argument('--longitude', type=float, default=37.61556, help='sample chunk longitude')
+    parser.add_argument('--time-chunk', type=int, default=0, help='sample chunk index along time')
+    parser.add_argument('--repeat', type=int, default=5, help='number of timed runs')
+    args = parser.parse_args()
+    root = get_storage(args.data)
+
+    datasets: list[tuple[str, dict[str, const.Encoding], float, BoundingBox, bool]] = [
+        (
+            const.CFS2_REANALYSIS_DIR,
+            const.CFS2_ENCODINGS,
+            const.CFS2_REANALYSIS_RESOLUTION[0],
+            const.CFS2_REANALYSIS_BBOX,
+            False,
+        ),
+        (const.CMIP6_DIR, const.CMIP6_ENCODINGS, const.CMIP6_RESOLUTION, const.CMIP6_BBOX, True),
+    ]
+    default_kwargs = {'compressor': zarr.storage.default_compressor, 'filters': None}
+
+    print(  # noqa: T201
+        f'{"variable":<24}{"encoding":<12}{"ratio":>8}{"enc MB/s":>10}{"dec MB/s":>10}'
+        f'{"max rel err":>14}'
+    )
+    for group_path, encodings, resolution, bbox, lon360 in datasets:
+        group = root.get(group_path)
+        if group is None:
+            continue
+        longitude = args.longitude + 360 if lon360 and args.longitude < 0 else args.longitude
+        lat_i = round((bbox.top - args.latitude) / resolution)
+        lon_i = round((longitude - bbox.left) / resolution)
+        for var, encoding in encodings.items():
+            array = group.get(var)
+            if array is None:
+                continue
+            _, lat_chunk, lon_chunk = array.chunks
+            data = array.get_block_selection(
+                (args.time_chunk, lat_i // lat_chunk, lon_i // lon_chunk)
+            )
+            for name, kwargs in (
+                ('default', default_kwargs),
+                ('weatheasy', encoding_kwargs(encoding)),
+            ):
+                res = _measure(data, **kwargs, repeat=args.repeat)
+                print(  # noqa: T201
+                    f'{group_path + "/" + var:<24}{name:<12}{res.ratio:>8.2f}'
+                    f'{res.encode_speed:>10.0f}{res.decode_speed:>10.0f}{res.max_error:>14.2e}'
+                )
+
+
+def _measure(
+    data: NDArray[np.float32],
+    compressor: Codec,
+    filters: list[Codec] | None,
+    repeat: int,
+) -> Result:
+    filters = filters or []
+
+    start = perf_counter()
+    for _ in range(repeat):
+        encoded = data
+        for codec in filters:
+            encoded = codec.encode(encoded)
+        cdata = compressor.encode(encoded)
+    encode_time = (perf_counter() - start) / repeat
+
+    start = perf_counter()
+    for _ in range(repeat):
+        decoded = compressor.decode(cdata)
+        for codec in reversed(filters):
+            decoded = codec.decode(decoded)
+    decode_time = (perf_counter() - start) / repeat
+
+    decoded = np.frombuffer(decoded, data.dtype).reshape(data.shape)
+    valid = np.isfinite(data) & (data != 0)
+    max_error = float(
+        np.max(np.abs(decoded[valid] - data[valid]) / np.abs(data[valid])) if valid.any() else 0
+    )
+    megabytes = data.nbytes / 2**20
+    return Result(
+        ratio=data.nbytes / len(cdata),
+        encode_speed=megabytes / encode_time,
+        decode_speed=megabytes / decode_time,
+        max_error=max_error,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""Measure latency and throughput of point queries.
+
+Generates synthetic CFS2 reanalysis, CFS2 forecast and CMIP6 stores with the
+shapes, chunking and encodings used by `weatheasy.download`. Values are
+written only for a small area and the queried days, so generating takes
+seconds. Then runs point queries at random points of the area for several
+date range lengths, variable counts and concurrency levels, directly through
+`get_cfs2_data` / `get_cmip6_data` and end to end through the web API:
+
+    python3 benchmarks/queries.py -d STORE --generate [--timeseries]
+    python3 benchmarks/queries.py -d STORE [--target python web]
+
+STORE is a local directory or `s3://<bucket>[/path]`, the MinIO from
+`compose.dev.yml` serves as a local S3. Generating refuses to write to a
+store with downloaded data.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from itertools import product
+from time import perf_counter
+from typing import TYPE_CHECKING, NamedTuple
+from urllib.parse import urlencode
+
+import numpy as np
+
+from weatheasy import Coords, const, get_cfs2_data, get_cmip6_data
+from weatheasy.cache import ChunkCache
+from weatheasy.download import (
+    _FOUR_YEAR_DAYS,
+    _LAST,
+    _get_cfs2_arrays,
+    _get_size,
+)
+from weatheasy.util import (
+    consolidate_metadata,
+    encoding_kwargs,
+    get_storage,
+    init_parser,
+    utc_now,
+)
+
+
+if TYPE_CHECKING:
+    from collections.abc import MutableMapping, Sequence
+    from typing import Any
+
+    import zarr
+    from fastapi import FastAPI
+
+    from weatheasy.const import BoundingBox
+
+
+# Root attribute marking stores generated by this benchmark
+BENCHMARK_KEY = 'benchmark'
+CMIP6_BEGIN = date(2030, 1, 1)
+# Reanalysis queries end this long before today, so they never reach the forecast
+REANALYSIS_LAG = timedelta(days=7)
+
+
+class Area(NamedTuple):
+    south: float
+    west: float
+    north: float
+    east: float
+
+
+class Case(NamedTuple):
+    dataset: str
+    begin: date
+    end: date
+    variables: list[str]
+
+
+class Result(NamedTuple):
+    p50: float
+    p95: float
+    throughput: float
+
+
+def main() -> None:
+    parser = init_parser('queries')
+    parser.add_argument('--generate', action='store_true', help='generate synthetic stores first')
+    parser.add_argument(
+        '--timeseries', action='store_true', help='generate time series optimized copies too'
+    )
+    parser.add_argument(
+        '--area',
+        type=float,
+        nargs=4,
+        default=(50.0, 30.0, 60.0, 45.0),
+        metavar=('SOUTH', 'WEST', 'NORTH', 'EAST'),
+        help='area with synthetic values, queried points are drawn from it',
+    )
+    parser.add_argument(
+        '--lengths', type=int, nargs='+', default=[7, 31, 365, 1461], help='date ranges in days'
+    )
+    parser.add_argument(
+        '--variables', type=int, nargs='+', default=[1, 4], help='numbers of queried variables'
+    )
+    parser.add_argument(
+        '--concurrency', type=int, nargs='+', default=[1, 8, 32], help='concurrent queries'
+    )
+    parser.add_argument('--queries', type=int, default=64, help='queries per measurement')
+    parser.add_argument(
+        '--cache-size',
+        type=int,
+        default=0,
+        help='chunk cache size in bytes, the cache is emptied before every measurement',
+    )
+    parser.add_argument('--target', nargs='+', choices=('python', 'web'), default=['python', 'web'])
+    parser.add_argument('--seed', type=int, default=0, help='random seed of queried points')
+    args = parser.parse_args()
+    area = Area(*args.area)
+    if not (-180 <= area.west < area.east <= 180 and -90 <= area.south < area.north <= 90):
+        parser.error('--area must not cross the antimeridian')
+
+    today = utc_now().date()
+    # PGB variables come second, so queries of several variables read both forecast grids
+    flx_vars = list(const.CFS2_FLX_BANDS)
+    cfs2_vars = [flx_vars[0], *const.CFS2_PGB_BANDS, *flx_vars[1:]]
+    variable_count = max(args.variables)
+    variables = {
+        'cfs2': cfs2_vars[:variable_count],
+        'cmip6': list(const.CMIP6_VARS)[:variable_count],
+    }
+    if args.generate:
+        root = get_storage(args.data)
+        if any(name in root for name in (const.CFS2_DIR, const.CMIP6_DIR)) and not root.attrs.get(
+            BENCHMARK_KEY
+        ):
+            sys.exit(f'{args.data} has data not generated by this benchmark')
+        root.attrs[BENCHMARK_KEY] = True
+        _generate(root, today, area, variables, max(args.lengths), timeseries=args.timeseries)
+        consolidate_metadata(root)
+
+    cases = list(_get_cases(today, args.lengths, args.variables, variables))
+    rng = np.random.default_rng(args.seed)
+    print(  # noqa: T201
+        f'{"target":<8}{"dataset":<18}{"days":>6}{"vars":>6}{"conc":>6}'
+        f'{"p50 ms":>10}{"p95 ms":>10}{"queries/s":>12}'
+    )
+    for target in args.target:
+        if target == 'python':
+            root = get_storage(args.data, consolidated=True)
+        else:
+            app = _get_app(args.data, args.cache_size)
+        for case, concurrency in product(cases, args.concurrency):
+            points = [
+                Coords(latitude, longitude)
+                for latitude, longitude in zip(
+                    rng.uniform(area.south, area.north, args.queries),
+                    rng.uniform(area.west, area.east, args.queries),
+                    strict=True,
+                )
+            ]
+            if target == 'python':
+                result = _measure_python(root, case, points, concurrency, args.cache_size)
+            else:
+                result = asyncio.run(_measure_web(app, case, points, concurrency))
+            print(  # noqa: T201
+                f'{target:<8}{case.dataset:<18}{(case.end - case.begin).days + 1:>6}'
+                f'{len(case.variables):>6}{concurrency:>6}{result.p50 * 1000:>10.1f}'
+                f'{result.p95 * 1000:>10.1f}{result.throughput:>12.1f}'
+            )
+
+
+def _generate(
+    root: zarr.Group,
+    today: date,
+    area: Area,
+    variables: dict[str, list[str]],
+    days: int,
+    *,
+    timeseries: bool,
+) -> None:
+    forecast_begin = today - const.CFS2_REANALYSIS_LAST_DATE_OFFSET
+    forecast_end = today - const.ONE_DAY + const.CFS2_FORECAST_DAYS
+
+    group = root.require_group(const.CFS2_REANALYSIS_DIR)
+    first_date = const.CFS2_REANALYSIS_FIRST_DATE
+    height, width = _get_size(const.CFS2_REANALYSIS_RESOLUTION[0], const.CFS2_REANALYSIS_BBOX)
+    shape = (forecast_begin.replace(month=12, day=31) - first_date.replace(month=1, day=1)).days
+    arrays = dict(_get_cfs2_arrays(group, (shape + 1, height, width), (_FOUR_YEAR_DAYS, 100, 100)))
+    last_day = (forecast_begin - first_date).days
+    for var in variables['cfs2']:
+        _fill(
+            group,
+            arrays[var],
+            (last_day - days - REANALYSIS_LAG.days, last_day),
+            area,
+            const.CFS2_REANALYSIS_RESOLUTION[0],
+            const.CFS2_REANALYSIS_BBOX,
+            lon360=False,
+            timeseries=timeseries,
+        )
+    group.attrs[_LAST] = (forecast_begin - const.ONE_DAY).isoformat()
+
+    cfs2_group = root.require_group(const.CFS2_DIR)
+    forecast_group = root.require_group(const.CFS2_FORECAST_DIR)
+    generation = utc_now().strftime(const.CFS2_FORECAST_GENERATION_FORMAT)
+    group = forecast_group.create_group(generation, overwrite=True)
+    forecast_days = (forecast_end - forecast_begin).days
+    for bands, resolution, bbox, lon360 in (
+        (const.CFS2_FLX_BANDS, const.CFS2_FLX_RESOLUTION[0], const.CFS2_FLX_BBOX, True),
+        (const.CFS2_PGB_BANDS, const.CFS2_PGB_RESOLUTION[0], const.CFS2_PGB_BBOX, False),
+    ):
+        height, width = _get_size(resolution, bbox)
+        for var in bands:
+            array = group.create_dataset(
+                name=var,
+                shape=(forecast_days, height, width),
+                dtype=np.float32,
+                chunks=(None, 100, 100),
+                fill_value=np.nan,
+                **encoding_kwargs(const.CFS2_ENCODINGS[var]),
+            )
+            if var in variables['cfs2']:
+                _fill(
+                    group,
+                    array,
+                    (0, forecast_days),
+                    area,
+                    resolution,
+                    bbox,
+                    lon360=lon360,
+                    timeseries=timeseries,
+                )
+    cfs2_group.attrs.update(
+        {const.CFS2_KEY_UPDATED: today.isoformat(), const.CFS2_KEY_FORECAST: generation}
+    )
+    for name in list(forecast_group):
+        if name != generation:
+            del forecast_group[name]
+
+    group = root.require_group(const.CMIP6_DIR)
+    first_date = date(const.CMIP6_FIRST_YEAR, 1, 1)
+    height, width = _get_size(const.CMIP6_RESOLUTION, const.CMIP6_BBOX)
+    shape = (date(const.CMIP6_LAST_YEAR, 12, 31) - first_date).days
+    first_day = (CMIP6_BEGIN - first_date).days
+    for var in variables['cmip6']:
+        array = group.require_dataset(
+            name=var,
+            shape=(shape, height + 1, width + 1),
+            dtype=np.float32,
+            chunks=(_FOUR_YEAR_DAYS, 100, 100),
+            fill_value=np.nan,
+            **encoding_kwargs(const.CMIP6_ENCODINGS[var]),
+        )
+        _fill(
+            group,
+            array,
+            (first_day, first_day + days),
+            area,
+            const.CMIP6_RESOLUTION,
+            const.CMIP6_BBOX,
+            lon360=True,
+            timeseries=timeseries,
+        )
+
+
+def _fill(
+    group: zarr.Group,
+    array: zarr.Array,
+    days: tuple[int, int],
+    area: Area,
+    resolution: float,
+    bbox: BoundingBox,
+    *,
+    lon360: bool,
+    timeseries: bool,
+) -> None:
+    """Write smooth values to whole chunks of `array` covering `days` and `area`.
+
+    With `timeseries` the same values are written to the time series
+    optimized copy, which is marked as synced with the whole array.
+    """
+
+    ts_array = None
+    if timeseries:
+        ts_array = group.require_group(const.TIMESERIES_DIR).require_dataset(
+            name=array.basename,
+            shape=array.shape,
+            dtype=array.dtype,
+            chunks=const.TIMESERIES_CHUNKS,
+            fill_value=np.nan,
+            compressor=array.compressor,
+            filters=array.filters,
+            write_empty_chunks=False,
+        )
+
+    west, east = (area.west % 360, area.east % 360) if lon360 else (area.west, area.east)
+    rows = _align(
+        math.floor((bbox.top - area.north) / resolution),
+        math.ceil((bbox.top - area.south) / resolution) + 1,
+        array.chunks[1],
+        array.shape[1],
+    )
+    cols = _align(
+        math.floor((west - bbox.left) / resolution),
+        math.ceil((east - bbox.left) / resolution) + 1,
+        array.chunks[2],
+        array.shape[2],
+    )
+    time_step = array.chunks[0]
+    begin = max(0, days[0])
+    blocks = product(
+        range(begin - begin % time_step, min(days[1], array.shape[0]), time_step), rows, cols
+    )
+    for t, y, x in blocks:
+        block = tuple(
+            slice(offset, min(offset + chunk, size))
+            for offset, chunk, size in zip((t, y, x), array.chunks, array.shape, strict=True)
+        )
+        t_index, y_index, x_index = np.ogrid[block]
+        array[block] = (
+            280
+            + 10 * np.sin(2 * np.pi * t_index / 365.25)
+            - 0.2 * y_index
+            + 0.05 * x_index
+            + np.sin(t_index + y_index * x_index)
+        )
+        if ts_array is not None:
+            ts_array[block] = array[block]
+    if ts_array is not None:
+        ts_array.attrs[const.TIMESERIES_KEY_SYNCED] = array.shape[0]
+
+
+def _align(begin: int, end: int, chunk: int, size: int) -> range:
+    """Get offsets of chunks covering `begin:end`."""
+
+    begin = max(0, begin)
+    return range(begin - begin % chunk, min(end, size), chunk)
+
+
+def _get_cases(
+    today: date,
+    lengths: Sequence[int],
+    variable_counts: Sequence[int],
+    variables: dict[str, list[str]],
+):
+    reanalysis_end = today - REANALYSIS_LAG
+    forecast_days = (const.CFS2_FORECAST_DAYS - const.ONE_DAY).days
+    for length, count in product(lengths, variable_counts):
+        period = timedelta(days=length - 1)
+        yield Case(
+            'cfs2-reanalysis',
+            reanalysis_end - period,
+            reanalysis_end,
+            variables['cfs2'][:count],
+        )
+        if length <= forecast_days:
+            yield Case('cfs2-forecast', today, today + period, variables['cfs2'][:count])
+        yield Case('cmip6', CMIP6_BEGIN, CMIP6_BEGIN + period, variables['cmip6'][:count])
+
+
+def _measure_python(
+    root: zarr.Group,
+    case: Case,
+    points: list[Coords],
+    concurrency: int,
+    cache_size: int,
+) -> Result:
+    cache = ChunkCache(cache_size)
+    get_data = get_cmip6_data if case.dataset == 'cmip6' else get_cfs2_data
+
+    def query(coords: Coords) -> float:
+        start = perf_counter()
+        get_data(
+            root=root,
+            begin=case.begin,
+            end=case.end,
+            coords=coords,
+            variables=case.variables,
+            cache=cache,
+        )
+        return perf_counter() - start
+
+    # Open the arrays before timing
+    query(points[0])
+    cache.clear()
+    start = perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        latencies = list(executor.map(query, points))
+    return _summarize(latencies, perf_counter() - start)
+
+
+def _get_app(data: str, cache_size: int) -> FastAPI:
+    # The web application reads its settings on import
+    os.environ['WEATHEASY__DATA_ROOT'] = data
+    os.environ['WEATHEASY__CHUNK_CACHE_SIZE'] = str(cache_size)
+    from weatheasy.web import app
+
+    return app
+
+
+async def _measure_web(app: FastAPI, case: Case, points: list[Coords], concurrency: int) -> Result:
+    from weatheasy.web.config import get_config
+
+    path = '/cmip6' if case.dataset == 'cmip6' else '/cfs2'
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def query(coords: Coords) -> float:
+        query_string = urlencode(
+            {
+                'lat': coords.latitude,
+                'lon': coords.longitude,
+                'begin': case.begin.isoformat(),
+                'end': case.end.isoformat(),
+                'var': case.variables,
+            },
+            doseq=True,
+        )
+        async with semaphore:
+            start = perf_counter()
+            status = await _get(app, path, query_string)
+            latency = perf_counter() - start
+        if status != 200:
+            msg = f'GET {path}?{query_string} responded with {status}'
+            raise RuntimeError(msg)
+        return latency
+
+    await query(points[0])
+    get_config().chunk_cache.clear()
+    start = perf_counter()
+    latencies = await asyncio.gather(*(query(coords) for coords in points))
+    return _summarize(latencies, perf_counter() - start)
+
+
+async def _get(app: FastAPI, path: str, query_string: str) -> int:
+    """Send a GET request to the ASGI application, return the status and drop the body."""
+
+    status = 0
+    request_sent = False
+    response_complete = asyncio.Event()
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query_string.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'benchmark'), (b'accept', b'application/json')],
+        'client': ('127.0.0.1', 0),
+        'server': ('benchmark', 80),
+    }
+
+    async def receive() -> MutableMapping[str, Any]:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Streaming responses wait for the client to disconnect meanwhile
+        await response_complete.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message: MutableMapping[str, Any]) -> None:
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        elif not message.get('more_body', False):
+            response_complete.set()
+
+    await app(scope, receive, send)
+    return status
+
+
+def _summarize(latencies: list[float], elapsed: float) -> Result:
+    p50, p95 = np.percentile(latencies, (50, 95))
+    return Result(float(p50), float(p95), len(latencies) / elapsed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Measure startup time of WeathEasy entry points.
+
+Runs every command in a fresh interpreter and reports the best and the median
+wall time. Exits with an error if the query path imports modules needed only
+for downloading:
+
+    python3 benchmarks/startup.py [-d STORE] [--query] [--repeat N]
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from statistics import median
+from time import perf_counter
+
+from weatheasy.util import init_parser
+
+
+# Heavy modules which only `weatheasy.download` may import
+DOWNLOAD_MODULES = 'rasterio', 'netCDF4', 'requests'
+QUERY_MODULES = 'weatheasy.__main__', 'weatheasy.web'
+
+
+def main() -> None:
+    parser = init_parser('startup')
+    parser.add_argument('--repeat', type=int, default=10, help='number of timed runs')
+    parser.add_argument('--query', action='store_true', help='also time a CFS2 point query')
+    parser.add_argument('--begin', default='2024-01-01', help='point query begin date')
+    parser.add_argument('--end', default='2024-01-31', help='point query end date')
+    parser.add_argument('--latitude', type=float, default=55.75222, help='point query latitude')
+    parser.add_argument('--longitude', type=float, default=37.61556, help='point query longitude')
+    args = parser.parse_args()
+
+    # The web application reads its settings on import
+    env = {'WEATHEASY__DATA_ROOT': args.data, **os.environ}
+    commands = {
+        'python': [sys.executable, '-c', 'pass'],
+        'import weatheasy': [sys.executable, '-c', 'import weatheasy'],
+        'import weatheasy.web': [sys.executable, '-c', 'import weatheasy.web'],
+        'list-vars': [sys.executable, '-m', 'weatheasy', 'list-vars'],
+    }
+    if args.query:
+        commands['point query'] = [
+            sys.executable,
+            '-m',
+            'weatheasy',
+            '-d',
+            args.data,
+            'cfs2',
+            args.begin,
+            args.end,
+            str(args.latitude),
+            str(args.longitude),
+            'TMP',
+        ]
+
+    print(f'{"command":<24}{"best ms":>10}{"median ms":>12}')  # noqa: T201
+    for name, command in commands.items():
+        times = _measure(command, env, args.repeat)
+        print(f'{name:<24}{min(times) * 1000:>10.0f}{median(times) * 1000:>12.0f}')  # noqa: T201
+
+    if imported := _get_imported(env):
+        sys.exit(f'Query entry points import download modules: {", ".join(imported)}')
+
+
+def _measure(command: list[str], env: dict[str, str], repeat: int) -> list[float]:
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        subprocess.run(command, env=env, check=True, stdout=subprocess.DEVNULL)  # noqa: S603
+        times.append(perf_counter() - start)
+    return times
+
+
+def _get_imported(env: dict[str, str]) -> list[str]:
+    code = (
+        f'import sys, {", ".join(QUERY_MODULES)}\n'
+        f'print(*(m for m in {DOWNLOAD_MODULES!r} if m in sys.modules))'
+    )
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, '-c', code], env=env, check=True, capture_output=True, text=True
+    )
+    return result.stdout.split()
+
+
+if __name__ == '__main__':
+    main()
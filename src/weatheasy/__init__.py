@@ -1,14 +1,25 @@
 from __future__ import annotations
 
+from collections import defaultdict
 from datetime import date
 from functools import partial
-from typing import TYPE_CHECKING, NamedTuple
+from typing import TYPE_CHECKING, Literal, NamedTuple
 
 import numpy as np
 
 from weatheasy import const
-from weatheasy.error import CFS2Error, CMIP6DateRangeError, CoordsError, DateRangeError
-from weatheasy.util import utc_now
+from weatheasy.cache import ChunkCache, default_cache
+from weatheasy.climatology import DAY_SLOTS, get_day_slots
+from weatheasy.error import (
+    AreaError,
+    CFS2ClimatologyError,
+    CFS2Error,
+    CMIP6DateRangeError,
+    CoordsError,
+    DateRangeError,
+)
+from weatheasy.rollup import get_period_bounds, get_period_dates, get_periods, mean_periods
+from weatheasy.util import get_cfs2_forecast_path, utc_now
 
 
 if TYPE_CHECKING:
@@ -16,7 +27,15 @@ if TYPE_CHECKING:
 
     import zarr
     from numpy.typing import NDArray
-    from rasterio.coords import BoundingBox
+
+    from weatheasy.aio import AsyncChunkReader
+    from weatheasy.const import BoundingBox
+    from weatheasy.rollup import Aggregation, RollupLevel
+
+    type AreaCells = tuple[NDArray[np.intp], NDArray[np.intp], NDArray[np.float64]]
+
+
+_AREA_BATCH = 4
 
 
 class Coords(NamedTuple):
@@ -24,6 +43,22 @@ class Coords(NamedTuple):
     longitude: float
 
 
+class Bounds(NamedTuple):
+    """Area between two latitudes and two longitudes in decimal degrees."""
+
+    south: float
+    west: float
+    north: float
+    east: float
+
+
+type AreaStat = Literal['mean', 'min', 'max', 'std']
+# Bounds or a polygon given by its vertices
+type Area = Bounds | Sequence[Coords]
+
+AREA_STATS: tuple[AreaStat, ...] = 'mean', 'min', 'max', 'std'
+
+
 def get_cfs2_data(
     *,
     root: zarr.Group,
@@ -31,36 +66,267 @@ def get_cfs2_data(
     end: date,
     coords: Coords,
     variables: Sequence[str],
+    aggregation: Aggregation = 'day',
+    anomaly: bool = False,
+    cache: ChunkCache | None = None,
 ) -> NDArray[np.float32]:
+    return get_cfs2_data_many(
+        root=root,
+        begin=begin,
+        end=end,
+        coords=(coords,),
+        variables=variables,
+        aggregation=aggregation,
+        anomaly=anomaly,
+        cache=cache,
+    )[0]
+
+
+def get_cfs2_data_many(
+    *,
+    root: zarr.Group,
+    begin: date,
+    end: date,
+    coords: Sequence[Coords],
+    variables: Sequence[str],
+    aggregation: Aggregation = 'day',
+    anomaly: bool = False,
+    cache: ChunkCache | None = None,
+) -> NDArray[np.float32]:
+    """Query CFS2 data for several points at once.
+
+    Returns an array of shape `(len(coords), len(variables), days)`. Points
+    falling into the same chunk share a single chunk read.
+
+    With an `aggregation` other than `day` the last axis holds means over the
+    periods from the one of `begin` to the one of `end`, see
+    `weatheasy.rollup.get_period_dates`. They are read from precomputed
+    rollups when available.
+
+    With `anomaly` the daily normals of the reanalysis are subtracted from
+    the values, see `weatheasy.climatology`.
+    """
+
+    plan, res = plan_cfs2_data_many(
+        root=root,
+        begin=begin,
+        end=end,
+        coords=coords,
+        variables=variables,
+        aggregation=aggregation,
+        anomaly=anomaly,
+        cache=cache,
+    )
+    plan.execute()
+    return res
+
+
+def plan_cfs2_data_many(
+    *,
+    root: zarr.Group,
+    begin: date,
+    end: date,
+    coords: Sequence[Coords],
+    variables: Sequence[str],
+    aggregation: Aggregation = 'day',
+    anomaly: bool = False,
+    cache: ChunkCache | None = None,
+) -> tuple[QueryPlan, NDArray[np.float32]]:
+    """Plan a query like `get_cfs2_data_many` reading metadata only.
+
+    The returned array is filled when the plan is executed.
+    """
+
     _check_date_range(begin, end)
-    today = utc_now().date()
+    periods = len(get_period_dates(begin, end, aggregation))
+    res = np.full((len(coords), len(variables), periods), np.nan, np.float32)
+    plan = _plan_cfs2_data(root, begin, end, coords, variables, res, cache, aggregation)
+    if anomaly:
+        _plan_cfs2_anomaly(plan, root, begin, end, coords, variables, aggregation, res)
+    return plan, res
+
+
+def get_cfs2_area_data(
+    *,
+    root: zarr.Group,
+    begin: date,
+    end: date,
+    area: Area,
+    variables: Sequence[str],
+    stats: Sequence[AreaStat] = ('mean',),
+    cache: ChunkCache | None = None,
+) -> NDArray[np.float32]:
+    """Query daily statistics of CFS2 data over an area.
+
+    Returns an array of shape `(len(stats), len(variables), days)`. Grid
+    cells are weighted by their area, missing values are skipped. Chunks
+    are read and reduced a few at a time.
+    """
+
+    plan, res = plan_cfs2_area_data(
+        root=root,
+        begin=begin,
+        end=end,
+        area=area,
+        variables=variables,
+        stats=stats,
+        cache=cache,
+    )
+    plan.execute()
+    return res
+
+
+def plan_cfs2_area_data(
+    *,
+    root: zarr.Group,
+    begin: date,
+    end: date,
+    area: Area,
+    variables: Sequence[str],
+    stats: Sequence[AreaStat] = ('mean',),
+    cache: ChunkCache | None = None,
+) -> tuple[QueryPlan, NDArray[np.float32]]:
+    """Plan a query like `get_cfs2_area_data` reading metadata only."""
+
+    _check_date_range(begin, end)
+    _check_area(area)
+    res = np.full((len(stats), len(variables), (end - begin).days + 1), np.nan, np.float32)
+    target = _AreaTarget(area, stats)
+    return _plan_cfs2_data(root, begin, end, target, variables, res, cache), res
 
-    cfs2_group = root.require_group(const.CFS2_DIR)
+
+def _plan_cfs2_data(
+    root: zarr.Group,
+    begin: date,
+    end: date,
+    target: Sequence[Coords] | _AreaTarget,
+    variables: Sequence[str],
+    res: NDArray[np.float32],
+    cache: ChunkCache | None,
+    aggregation: Aggregation = 'day',
+) -> QueryPlan:
+    today = utc_now().date()
+    if aggregation != 'day':
+        # Branches below are chosen by whole periods, a query of the last day of a period
+        # must not reach the forecast branch, which reads days only
+        begin, end = get_period_bounds(begin, end, aggregation)
+        if end > today:
+            # Rollups cover the reanalysis only, periods reaching the forecast are averaged
+            # from daily values
+            daily = np.full((*res.shape[:-1], (end - begin).days + 1), np.nan, np.float32)
+            plan = _plan_cfs2_data(root, begin, end, target, variables, daily, cache)
+            plan.reduce_periods(daily, begin, aggregation, res)
+            return plan
+    if cache is None:
+        cache = default_cache
+
+    # Attributes are read once, so the update stamp and the forecast generation match
     try:
-        cfs2_updated = cfs2_group.attrs[const.CFS2_KEY_UPDATED]
+        cfs2_attrs = root[const.CFS2_DIR].attrs.asdict()
+        cfs2_updated = cfs2_attrs[const.CFS2_KEY_UPDATED]
     except KeyError as err:
         raise CFS2Error from err
+    cache.validate(const.CFS2_DIR, (root.attrs.get(const.KEY_CONSOLIDATED), cfs2_updated))
     first_forecast_day = date.fromisoformat(cfs2_updated) - const.CFS2_REANALYSIS_LAST_DATE_OFFSET
 
-    forecast_group = root.require_group(const.CFS2_FORECAST_DIR)
+    plan = QueryPlan(cache)
+    # Groups are looked up only when the query reaches them
+    forecast_path = get_cfs2_forecast_path(cfs2_attrs)
     if begin >= today:
-        return _get_cfs2_forecast(forecast_group, first_forecast_day, begin, end, coords, variables)
+        _get_cfs2_forecast(
+            root[forecast_path], first_forecast_day, begin, end, target, variables, res, plan=plan
+        )
+        return plan
 
-    reanalysis_group = root.require_group(const.CFS2_REANALYSIS_DIR)
+    reanalysis_group = root[const.CFS2_REANALYSIS_DIR]
     if end <= today:
-        return _get_cfs2_reanalysis(
-            reanalysis_group, const.CFS2_REANALYSIS_FIRST_DATE, begin, end, coords, variables
+        _get_cfs2_reanalysis(
+            reanalysis_group,
+            const.CFS2_REANALYSIS_FIRST_DATE,
+            begin,
+            end,
+            target,
+            variables,
+            res,
+            plan=plan,
+            aggregation=aggregation,
         )
+        return plan
 
     mid = min(today, end)
-    reanalysis = _get_cfs2_reanalysis(
-        reanalysis_group, const.CFS2_REANALYSIS_FIRST_DATE, begin, mid, coords, variables
+    split = (mid - begin).days + 1
+    _get_cfs2_reanalysis(
+        reanalysis_group,
+        const.CFS2_REANALYSIS_FIRST_DATE,
+        begin,
+        mid,
+        target,
+        variables,
+        res[..., :split],
+        plan=plan,
     )
-    forecast = _get_cfs2_forecast(
-        forecast_group, first_forecast_day, mid + const.ONE_DAY, end, coords, variables
+    _get_cfs2_forecast(
+        root[forecast_path],
+        first_forecast_day,
+        mid + const.ONE_DAY,
+        end,
+        target,
+        variables,
+        res[..., split:],
+        plan=plan,
     )
 
-    return np.concat((reanalysis, forecast), axis=1)
+    return plan
+
+
+def get_cfs2_cells(coords: Coords) -> tuple[tuple[int, int] | None, ...]:
+    """Get indices of the cells of `coords` in every CFS2 grid, None if out of a grid.
+
+    Queries of points with the same cells read the same values.
+    """
+
+    return (
+        _get_cell(coords, const.CFS2_REANALYSIS_RESOLUTION[0], const.CFS2_REANALYSIS_BBOX),
+        _get_cell(coords, const.CFS2_FLX_RESOLUTION[0], const.CFS2_FLX_BBOX, lon360=True),
+        _get_cell(coords, const.CFS2_PGB_RESOLUTION[0], const.CFS2_PGB_BBOX),
+    )
+
+
+def _plan_cfs2_anomaly(
+    plan: QueryPlan,
+    root: zarr.Group,
+    begin: date,
+    end: date,
+    coords: Sequence[Coords],
+    variables: Sequence[str],
+    aggregation: Aggregation,
+    res: NDArray[np.float32],
+) -> None:
+    """Plan subtracting daily normals from `res`.
+
+    Normals of the nearest reanalysis cell are used for forecast days too.
+    All 366 normals of a point are a single chunk read.
+    """
+
+    group = root.get(const.CFS2_CLIMATOLOGY_DIR)
+    if group is None:
+        raise CFS2ClimatologyError
+
+    indices = [
+        _coords_to_indices(c, const.CFS2_REANALYSIS_RESOLUTION[0], const.CFS2_REANALYSIS_BBOX)
+        for c in coords
+    ]
+    normals = np.full((len(coords), len(variables), DAY_SLOTS), np.nan, np.float32)
+    for var_i, var in enumerate(variables):
+        array = group.get(f'mean/{var}')
+        if array is None:
+            raise CFS2ClimatologyError(var)
+        plan.read_points(array, 0, DAY_SLOTS, indices, normals[:, var_i])
+
+    first, last = get_period_bounds(begin, end, aggregation)
+    days = np.arange(np.datetime64(first, 'D'), np.datetime64(last, 'D') + 1)
+    periods = None if aggregation == 'day' else get_periods(days, aggregation, first.year)
+    plan.subtract_normals(normals, get_day_slots(days), periods, res)
 
 
 def get_cmip6_data(
@@ -70,8 +336,137 @@ def get_cmip6_data(
     end: date,
     coords: Coords,
     variables: Sequence[str],
+    aggregation: Aggregation = 'day',
+    cache: ChunkCache | None = None,
 ) -> NDArray[np.float32]:
+    return get_cmip6_data_many(
+        root=root,
+        begin=begin,
+        end=end,
+        coords=(coords,),
+        variables=variables,
+        aggregation=aggregation,
+        cache=cache,
+    )[0]
+
+
+def get_cmip6_data_many(
+    *,
+    root: zarr.Group,
+    begin: date,
+    end: date,
+    coords: Sequence[Coords],
+    variables: Sequence[str],
+    aggregation: Aggregation = 'day',
+    cache: ChunkCache | None = None,
+) -> NDArray[np.float32]:
+    """Query CMIP6 data for several points at once.
+
+    Returns an array of shape `(len(coords), len(variables), days)`. Points
+    falling into the same chunk share a single chunk read.
+
+    With an `aggregation` other than `day` the last axis holds means over the
+    periods from the one of `begin` to the one of `end`, see
+    `weatheasy.rollup.get_period_dates`. They are read from precomputed
+    rollups when available.
+    """
+
+    plan, res = plan_cmip6_data_many(
+        root=root,
+        begin=begin,
+        end=end,
+        coords=coords,
+        variables=variables,
+        aggregation=aggregation,
+        cache=cache,
+    )
+    plan.execute()
+    return res
+
+
+def plan_cmip6_data_many(
+    *,
+    root: zarr.Group,
+    begin: date,
+    end: date,
+    coords: Sequence[Coords],
+    variables: Sequence[str],
+    aggregation: Aggregation = 'day',
+    cache: ChunkCache | None = None,
+) -> tuple[QueryPlan, NDArray[np.float32]]:
+    """Plan a query like `get_cmip6_data_many` reading metadata only.
+
+    The returned array is filled when the plan is executed.
+    """
+
+    _check_date_range(begin, end)
+    periods = len(get_period_dates(begin, end, aggregation))
+    res = np.full((len(coords), len(variables), periods), np.nan, np.float32)
+    return _plan_cmip6_data(root, begin, end, coords, variables, res, cache, aggregation), res
+
+
+def get_cmip6_area_data(
+    *,
+    root: zarr.Group,
+    begin: date,
+    end: date,
+    area: Area,
+    variables: Sequence[str],
+    stats: Sequence[AreaStat] = ('mean',),
+    cache: ChunkCache | None = None,
+) -> NDArray[np.float32]:
+    """Query daily statistics of CMIP6 data over an area like `get_cfs2_area_data`."""
+
+    plan, res = plan_cmip6_area_data(
+        root=root,
+        begin=begin,
+        end=end,
+        area=area,
+        variables=variables,
+        stats=stats,
+        cache=cache,
+    )
+    plan.execute()
+    return res
+
+
+def plan_cmip6_area_data(
+    *,
+    root: zarr.Group,
+    begin: date,
+    end: date,
+    area: Area,
+    variables: Sequence[str],
+    stats: Sequence[AreaStat] = ('mean',),
+    cache: ChunkCache | None = None,
+) -> tuple[QueryPlan, NDArray[np.float32]]:
+    """Plan a query like `get_cmip6_area_data` reading metadata only."""
+
     _check_date_range(begin, end)
+    _check_area(area)
+    res = np.full((len(stats), len(variables), (end - begin).days + 1), np.nan, np.float32)
+    target = _AreaTarget(area, stats)
+    return _plan_cmip6_data(root, begin, end, target, variables, res, cache), res
+
+
+def get_cmip6_cells(coords: Coords) -> tuple[tuple[int, int] | None, ...]:
+    """Get indices of the cell of `coords` in the CMIP6 grid like `get_cfs2_cells`."""
+
+    return (_get_cell(coords, const.CMIP6_RESOLUTION, const.CMIP6_BBOX, lon360=True),)
+
+
+def _plan_cmip6_data(
+    root: zarr.Group,
+    begin: date,
+    end: date,
+    target: Sequence[Coords] | _AreaTarget,
+    variables: Sequence[str],
+    res: NDArray[np.float32],
+    cache: ChunkCache | None,
+    aggregation: Aggregation = 'day',
+) -> QueryPlan:
+    if cache is None:
+        cache = default_cache
     first_date = date(const.CMIP6_FIRST_YEAR, 1, 1)
     last_date = date(const.CMIP6_LAST_YEAR, 12, 31)
     if begin < first_date:
@@ -82,13 +477,327 @@ def get_cmip6_data(
     begin_i = (begin - first_date).days
     end_i = (end - first_date).days + 1
 
-    lat_i, lon_i = _coords_to_indices(coords, const.CMIP6_RESOLUTION, const.CMIP6_BBOX, lon360=True)
-
-    cmip6 = root.require_group('cmip6')
-    res = np.zeros((len(variables), end_i - begin_i), np.float32)
+    # Downloads consolidate the metadata when they finish
+    cache.validate(const.CMIP6_DIR, root.attrs.get(const.KEY_CONSOLIDATED))
+    cmip6 = root['cmip6']
+    plan = QueryPlan(cache)
+    if isinstance(target, _AreaTarget):
+        for var_i, var in enumerate(variables):
+            array = cmip6[var]
+            cells = _get_area_cells(
+                target.area, array.shape[1:], const.CMIP6_RESOLUTION, const.CMIP6_BBOX, lon360=True
+            )
+            plan.reduce_area(array, begin_i, end_i, cells, target.stats, res[:, var_i])
+        return plan
+
+    indices = [
+        _coords_to_indices(c, const.CMIP6_RESOLUTION, const.CMIP6_BBOX, lon360=True) for c in target
+    ]
     for var_i, var in enumerate(variables):
-        res[var_i] = cmip6[var][begin_i:end_i, lat_i, lon_i]
-    return res
+        _plan_points(plan, cmip6, var, first_date, begin, end, indices, aggregation, res[:, var_i])
+    return plan
+
+
+class QueryPlan:
+    """Chunk reads of a query, fetched all at once before slicing.
+
+    Planned reads only fill their output arrays on execution, so chunks of
+    all variables and data groups of a query are fetched concurrently.
+    """
+
+    def __init__(self, cache: ChunkCache) -> None:
+        self._cache = cache
+        self._requests: list[tuple[zarr.Array, tuple[int, int, int]]] = []
+        self._slices: list[tuple[NDArray[np.float32], tuple, tuple]] = []
+        self._area_requests: list[tuple[zarr.Array, tuple[int, int, int]]] = []
+        self._area_parts: list[tuple[_WeightedStats, slice, tuple, NDArray[np.float64]]] = []
+        self._area_stats: list[_WeightedStats] = []
+        self._period_means: list[tuple[NDArray[np.float32], NDArray[np.int64], NDArray]] = []
+        self._normals: list[
+            tuple[NDArray[np.float32], NDArray[np.intp], NDArray[np.int64] | None, NDArray]
+        ] = []
+
+    def read_points(
+        self,
+        array: zarr.Array,
+        begin: int,
+        end: int,
+        indices: Sequence[tuple[int, int]],
+        out: NDArray[np.float32],
+    ) -> None:
+        """Plan reading `array[begin:end]` at each of `indices` into `out`.
+
+        Points are grouped by spatial tile, so every chunk is read once.
+        """
+
+        time_chunk, lat_chunk, lon_chunk = array.chunks
+        end = min(end, array.shape[0])
+
+        tiles: defaultdict[tuple[int, int], list[int]] = defaultdict(list)
+        for point_i, (lat_i, lon_i) in enumerate(indices):
+            tiles[lat_i // lat_chunk, lon_i // lon_chunk].append(point_i)
+
+        for (tile_lat, tile_lon), points in tiles.items():
+            lat = np.array([indices[i][0] for i in points]) % lat_chunk
+            lon = np.array([indices[i][1] for i in points]) % lon_chunk
+            for time_i in range(max(begin, 0) // time_chunk, -(-end // time_chunk)):
+                chunk_begin = time_i * time_chunk
+                first = max(begin, chunk_begin)
+                last = min(end, chunk_begin + time_chunk)
+                self._requests.append((array, (time_i, tile_lat, tile_lon)))
+                self._slices.append(
+                    (
+                        out,
+                        np.s_[points, first - begin : last - begin],
+                        np.s_[first - chunk_begin : last - chunk_begin, lat, lon],
+                    )
+                )
+
+    def reduce_area(
+        self,
+        array: zarr.Array,
+        begin: int,
+        end: int,
+        cells: AreaCells,
+        stats: Sequence[AreaStat],
+        out: NDArray[np.float32],
+    ) -> None:
+        """Plan computing `stats` of `array[begin:end]` over `cells` into `out`.
+
+        `out` has shape `(len(stats), end - begin)`. Chunks are read on
+        execution in batches of `_AREA_BATCH` and reduced right away.
+        """
+
+        time_chunk, lat_chunk, lon_chunk = array.chunks
+        end = min(end, array.shape[0])
+        acc = _WeightedStats(stats, out)
+        self._area_stats.append(acc)
+
+        rows, cols, weights = cells
+        for tile_lat in np.unique(rows // lat_chunk):
+            tile_rows = np.flatnonzero(rows // lat_chunk == tile_lat)
+            for tile_lon in np.unique(cols // lon_chunk):
+                tile_cols = np.flatnonzero(cols // lon_chunk == tile_lon)
+                tile_weights = weights[np.ix_(tile_rows, tile_cols)]
+                if not tile_weights.any():
+                    continue
+                index = np.ix_(rows[tile_rows] % lat_chunk, cols[tile_cols] % lon_chunk)
+                for time_i in range(max(begin, 0) // time_chunk, -(-end // time_chunk)):
+                    chunk_begin = time_i * time_chunk
+                    first = max(begin, chunk_begin)
+                    last = min(end, chunk_begin + time_chunk)
+                    self._area_requests.append((array, (time_i, int(tile_lat), int(tile_lon))))
+                    self._area_parts.append(
+                        (
+                            acc,
+                            np.s_[first - begin : last - begin],
+                            np.s_[first - chunk_begin : last - chunk_begin, *index],
+                            tile_weights,
+                        )
+                    )
+
+    def reduce_periods(
+        self,
+        daily: NDArray[np.float32],
+        first: date,
+        level: RollupLevel,
+        out: NDArray[np.float32],
+    ) -> None:
+        """Plan averaging `daily` values starting from `first` over `level` periods into `out`.
+
+        `daily` must be filled by reads of the same plan.
+        """
+
+        days = np.datetime64(first, 'D') + np.arange(daily.shape[-1])
+        self._period_means.append((daily, get_periods(days, level, first.year), out))
+
+    def subtract_normals(
+        self,
+        normals: NDArray[np.float32],
+        slots: NDArray[np.int64],
+        periods: NDArray[np.int64] | None,
+        out: NDArray[np.float32],
+    ) -> None:
+        """Plan subtracting `normals` of days given by their `slots` from `out`.
+
+        Normals are averaged over `periods` of the days first if they are
+        passed. `normals` must be filled by reads of the same plan.
+        """
+
+        self._normals.append((normals, slots, periods, out))
+
+    def execute(self) -> None:
+        self._fill(self._cache.get_many(self._requests))
+        for start in range(0, len(self._area_requests), _AREA_BATCH):
+            stop = start + _AREA_BATCH
+            self._reduce(self._cache.get_many(self._area_requests[start:stop]), start)
+        self._finish()
+
+    async def execute_async(self, reader: AsyncChunkReader) -> None:
+        """Execute the plan awaiting chunk reads on the running event loop."""
+
+        self._fill(await self._cache.get_many_async(self._requests, reader))
+        for start in range(0, len(self._area_requests), _AREA_BATCH):
+            stop = start + _AREA_BATCH
+            requests = self._area_requests[start:stop]
+            self._reduce(await self._cache.get_many_async(requests, reader), start)
+        self._finish()
+
+    def _fill(self, chunks: list[NDArray[np.float32]]) -> None:
+        for chunk, (out, out_index, chunk_index) in zip(chunks, self._slices, strict=True):
+            out[out_index] = chunk[chunk_index].transpose()
+        self._requests.clear()
+        self._slices.clear()
+
+    def _reduce(self, chunks: list[NDArray[np.float32]], start: int) -> None:
+        for chunk, (acc, days, chunk_index, weights) in zip(
+            chunks, self._area_parts[start:], strict=False
+        ):
+            acc.add(days, chunk[chunk_index], weights)
+
+    def _finish(self) -> None:
+        for acc in self._area_stats:
+            acc.finish()
+        for daily, periods, out in self._period_means:
+            out[:] = mean_periods(daily, periods)
+        for normals, slots, normal_periods, out in self._normals:
+            daily = normals[..., slots]
+            out[:] -= daily if normal_periods is None else mean_periods(daily, normal_periods)
+        self._area_requests.clear()
+        self._area_parts.clear()
+        self._area_stats.clear()
+        self._period_means.clear()
+        self._normals.clear()
+
+
+class _WeightedStats:
+    """Weighted statistics of area values per day accumulated block by block.
+
+    Means and squared deviations of blocks are merged pairwise, which keeps
+    the standard deviation accurate for large values.
+    """
+
+    def __init__(self, stats: Sequence[AreaStat], out: NDArray[np.float32]) -> None:
+        days = out.shape[-1]
+        self._stats = stats
+        self._out = out
+        self._weight = np.zeros(days)
+        self._mean = np.zeros(days)
+        self._m2 = np.zeros(days)
+        self._min = np.full(days, np.inf)
+        self._max = np.full(days, -np.inf)
+
+    def add(self, days: slice, block: NDArray[np.float32], weights: NDArray[np.float64]) -> None:
+        """Add `block` of shape `(days, rows, cols)` with `weights` of shape `(rows, cols)`."""
+
+        valid = np.isfinite(block) & (weights > 0)
+        weights = np.where(valid, weights, 0)
+        values = np.where(valid, block, 0)
+        block_weight = weights.sum(axis=(1, 2))
+        weight = self._weight[days] + block_weight
+        with np.errstate(divide='ignore', invalid='ignore'):
+            block_mean = np.nan_to_num((weights * values).sum(axis=(1, 2)) / block_weight)
+            share = np.nan_to_num(block_weight / weight)
+        deviations = values - block_mean[:, np.newaxis, np.newaxis]
+        block_m2 = (weights * deviations * deviations).sum(axis=(1, 2))
+        delta = block_mean - self._mean[days]
+        self._mean[days] += delta * share
+        self._m2[days] += block_m2 + delta * delta * self._weight[days] * share
+        self._weight[days] = weight
+        if 'min' in self._stats:
+            block_min = np.where(valid, block, np.inf).min(axis=(1, 2))
+            np.minimum(self._min[days], block_min, out=self._min[days])
+        if 'max' in self._stats:
+            block_max = np.where(valid, block, -np.inf).max(axis=(1, 2))
+            np.maximum(self._max[days], block_max, out=self._max[days])
+
+    def finish(self) -> None:
+        empty = self._weight == 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = {
+                'mean': self._mean,
+                'std': np.sqrt(self._m2 / self._weight),
+                'min': self._min,
+                'max': self._max,
+            }
+        for out, stat in zip(self._out, self._stats, strict=True):
+            out[:] = np.where(empty, np.nan, values[stat])
+
+
+class _AreaTarget(NamedTuple):
+    area: Area
+    stats: Sequence[AreaStat]
+
+
+def _check_area(area: Area) -> None:
+    if isinstance(area, Bounds):
+        if area.south > area.north or area.west > area.east:
+            raise AreaError(area)
+    elif len(area) < 3:
+        raise AreaError(area)
+
+
+def _get_area_cells(
+    area: Area,
+    shape: tuple[int, ...],
+    resolution: float,
+    bbox: BoundingBox,
+    *,
+    lon360: bool = False,
+) -> AreaCells:
+    """Get rows, columns and weights of grid cells with centers inside `area`.
+
+    Weights are proportional to cell areas: sine differences of the
+    latitudes of cell edges clipped to the poles, so polar cells keep a
+    positive weight. If no cell center is inside the area, the cell nearest
+    to its center is used.
+    """
+
+    height, width = shape
+    latitudes = bbox.top - np.arange(height) * resolution
+    longitudes = bbox.left + np.arange(width) * resolution
+    if lon360:
+        longitudes = np.where(longitudes >= 180, longitudes - 360, longitudes)
+
+    if isinstance(area, Bounds):
+        south, west, north, east = area
+    else:
+        south, west = np.min(area, axis=0)
+        north, east = np.max(area, axis=0)
+    rows = np.flatnonzero((latitudes >= south) & (latitudes <= north))
+    cols = np.flatnonzero((longitudes >= west) & (longitudes <= east))
+    north = np.radians(np.clip(bbox.top - rows * resolution, -90, 90))
+    south = np.radians(np.clip(bbox.top - (rows + 1) * resolution, -90, 90))
+    bands = np.sin(north) - np.sin(south)
+    weights = np.repeat(bands[:, np.newaxis], len(cols), axis=1)
+    if not isinstance(area, Bounds):
+        weights *= _polygon_contains(area, latitudes[rows, np.newaxis], longitudes[cols])
+
+    if not weights.any():
+        center = Coords((south + north) / 2, (west + east) / 2)
+        row, col = _coords_to_indices(center, resolution, bbox, lon360=lon360)
+        rows, cols = np.array([row]), np.array([col])
+        weights = np.ones((1, 1))
+
+    return rows, cols, weights
+
+
+def _polygon_contains(
+    polygon: Sequence[Coords],
+    latitude: NDArray[np.floating],
+    longitude: NDArray[np.floating],
+) -> NDArray[np.bool_]:
+    """Test points against `polygon` with the even-odd rule."""
+
+    inside = np.zeros(np.broadcast_shapes(latitude.shape, longitude.shape), np.bool_)
+    vertices = np.asarray(polygon, np.float64)
+    for (lat0, lon0), (lat1, lon1) in zip(vertices, np.roll(vertices, -1, axis=0), strict=True):
+        if lat0 == lat1:
+            continue
+        crosses = (lat0 > latitude) != (lat1 > latitude)
+        edge_longitude = lon0 + (latitude - lat0) * (lon1 - lon0) / (lat1 - lat0)
+        inside ^= crosses & (longitude < edge_longitude)
+    return inside
 
 
 def _check_date_range(first: date, last: date):
@@ -96,6 +805,54 @@ def _check_date_range(first: date, last: date):
         raise DateRangeError
 
 
+def _get_array(group: zarr.Group, var: str, end: int) -> zarr.Array:
+    """Prefer the time series optimized copy of `group[var]` if it covers `end` days."""
+
+    ts_array = group.get(f'{const.TIMESERIES_DIR}/{var}')
+    if ts_array is not None and ts_array.attrs.get(const.TIMESERIES_KEY_SYNCED, 0) >= end:
+        return ts_array
+    return group[var]
+
+
+def _plan_points(
+    plan: QueryPlan,
+    group: zarr.Group,
+    var: str,
+    first_date: date,
+    begin: date,
+    end: date,
+    indices: Sequence[tuple[int, int]],
+    aggregation: Aggregation,
+    out: NDArray[np.float32],
+) -> None:
+    """Plan reading values of `group[var]` from `begin` to `end` at each of `indices` into `out`.
+
+    Period means are read from the rollup of `group[var]` if it covers the
+    periods, otherwise they are averaged from daily values.
+    """
+
+    if aggregation == 'day':
+        begin_i = (begin - first_date).days
+        end_i = (end - first_date).days + 1
+        plan.read_points(_get_array(group, var, end_i), begin_i, end_i, indices, out)
+        return
+
+    first, last = get_period_bounds(begin, end, aggregation)
+    begin_i = (first - first_date).days
+    end_i = (last - first_date).days + 1
+    rollup = group.get(f'{const.ROLLUP_DIR}/{aggregation}/{var}')
+    covered = min(end_i, group[var].shape[0])
+    if rollup is not None and rollup.attrs.get(const.ROLLUP_KEY_SYNCED, 0) >= covered:
+        bounds = np.array([first, last], 'datetime64[D]')
+        period_begin, period_last = get_periods(bounds, aggregation, first_date.year)
+        plan.read_points(rollup, period_begin, period_last + 1, indices, out)
+        return
+
+    daily = np.full((len(indices), end_i - begin_i), np.nan, np.float32)
+    plan.read_points(_get_array(group, var, end_i), begin_i, end_i, indices, daily)
+    plan.reduce_periods(daily, first, aggregation, out)
+
+
 def _coords_to_indices(
     coords: Coords,
     resolution: float,
@@ -117,33 +874,55 @@ def _coords_to_indices(
     )
 
 
+def _get_cell(
+    coords: Coords,
+    resolution: float,
+    bbox: BoundingBox,
+    *,
+    lon360: bool = False,
+) -> tuple[int, int] | None:
+    try:
+        return _coords_to_indices(coords, resolution, bbox, lon360=lon360)
+    except CoordsError:
+        return None
+
+
 def _get_cfs2_data(
     group: zarr.Group,
     first_date: date,
     begin: date,
     end: date,
-    coords: Coords,
+    target: Sequence[Coords] | _AreaTarget,
     variables: Sequence[str],
+    out: NDArray[np.float32],
     *,
     flx_bbox: BoundingBox,
     flx_resolution: float,
     pgb_bbox: BoundingBox,
     pbg_resolution: float,
-):
-    pgb_coord_ind = _coords_to_indices(coords, pbg_resolution, pgb_bbox)
-    flx_coord_ind = _coords_to_indices(coords, flx_resolution, flx_bbox, lon360=True)
-
-    end += const.ONE_DAY
-    begin_i = (begin - first_date).days
-    end_i = (end - first_date).days
-
-    res = np.zeros((len(variables), (end - begin).days), np.float32)
+    plan: QueryPlan,
+    aggregation: Aggregation = 'day',
+) -> None:
+    if isinstance(target, _AreaTarget):
+        begin_i = (begin - first_date).days
+        end_i = (end - first_date).days + 1
+        for var_i, var in enumerate(variables):
+            # Areas span many cells, so spatial tiles of the source suit them better
+            array = group[var]
+            if var in const.CFS2_PGB_BANDS:
+                cells = _get_area_cells(target.area, array.shape[1:], pbg_resolution, pgb_bbox)
+            else:
+                cells = _get_area_cells(
+                    target.area, array.shape[1:], flx_resolution, flx_bbox, lon360=True
+                )
+            plan.reduce_area(array, begin_i, end_i, cells, target.stats, out[:, var_i])
+        return
+
+    pgb_coord_ind = [_coords_to_indices(c, pbg_resolution, pgb_bbox) for c in target]
+    flx_coord_ind = [_coords_to_indices(c, flx_resolution, flx_bbox, lon360=True) for c in target]
     for var_i, var in enumerate(variables):
-        coord_ind = pgb_coord_ind if var in const.CFS2_PGB_BANDS else flx_coord_ind
-        chunk = group[var][begin_i:end_i, *coord_ind]
-        res[var_i] = chunk if chunk.size else np.nan
-
-    return res
+        indices = pgb_coord_ind if var in const.CFS2_PGB_BANDS else flx_coord_ind
+        _plan_points(plan, group, var, first_date, begin, end, indices, aggregation, out[:, var_i])
 
 
 _get_cfs2_reanalysis = partial(
@@ -3,16 +3,30 @@ from __future__ import annotations
 import logging
 import sys
 from datetime import date
+from functools import partial
 from pathlib import Path
 from typing import TYPE_CHECKING
 
+import numpy as np
+
 from weatheasy import Coords, const, get_cfs2_data, get_cmip6_data
-from weatheasy.util import float_formatter_factory, get_storage, init_parser
+from weatheasy.formats import BINARY_WRITERS, get_columns, iter_json_items
+from weatheasy.rollup import AGGREGATIONS, get_period_dates
+from weatheasy.util import array_formatter_factory, get_storage, init_parser
 
 
 if TYPE_CHECKING:
     from argparse import ArgumentParser, Namespace, _SubParsersAction
-    from collections.abc import Iterable
+    from collections.abc import Callable, Iterable, Sequence
+    from typing import BinaryIO, TextIO
+
+    from numpy.typing import NDArray
+
+    from weatheasy.rollup import Aggregation
+    from weatheasy.util import FormatArray
+
+
+_BLOCK_ROWS = 4096
 
 
 def main(*, configure_logging: bool = True) -> None:
@@ -38,6 +52,13 @@ def _parse_args():
         help='output file',
         default='stdout',
     )
+    parser.add_argument(
+        '-f',
+        '--format',
+        help='output format',
+        choices=('csv', 'ndjson', *BINARY_WRITERS),
+        default='csv',
+    )
     parser.add_argument(
         '-p',
         '--precision',
@@ -48,7 +69,12 @@ def _parse_args():
     subparsers = parser.add_subparsers(dest='action', required=True)
     subparsers.add_parser('list-vars', help='list available variables')
     _add_data_subparser(subparsers, 'cmip6', const.CMIP6_VARS)
-    _add_data_subparser(subparsers, 'cfs2', const.CFS2_BANDS)
+    cfs2_parser = _add_data_subparser(subparsers, 'cfs2', const.CFS2_BANDS)
+    cfs2_parser.add_argument(
+        '--anomaly',
+        help='subtract daily normals of the reanalysis from values',
+        action='store_true',
+    )
 
     return parser.parse_args()
 
@@ -63,6 +89,13 @@ def _add_data_subparser(
     parser.add_argument('end', type=date.fromisoformat, help='last date yyyy-mm-dd')
     parser.add_argument('latitude', type=float, help='decimal degrees EPSG:4326')
     parser.add_argument('longitude', type=float, help='decimal degrees EPSG:4326')
+    parser.add_argument(
+        '-a',
+        '--aggregation',
+        help='average values over periods, rows are dated by the first day of a period',
+        choices=AGGREGATIONS,
+        default='day',
+    )
     parser.add_argument(
         'variables',
         help='output variables (run `weatheasy list-vars` for a full list of variables)',
@@ -75,48 +108,84 @@ def _add_data_subparser(
 
 
 def _run(args: Namespace):
+    func: Callable[..., NDArray[np.float32]]
     if args.action == 'cfs2':
-        func = get_cfs2_data
+        func = partial(get_cfs2_data, anomaly=args.anomaly)
     elif args.action == 'cmip6':
         func = get_cmip6_data
     else:
         raise RuntimeError
 
-    format_float = float_formatter_factory('NA', args.precision)
-    root = get_storage(args.data)
+    nan = 'null' if args.format == 'ndjson' else 'NA'
+    format_array = array_formatter_factory(nan, args.precision)
+    root = get_storage(args.data, consolidated=True)
     begin: date = args.begin
     end: date = args.end
     coords = Coords(latitude=args.latitude, longitude=args.longitude)
     variables: list[str] = args.variables
+    aggregation: Aggregation = args.aggregation
     data = func(
         root=root,
         begin=begin,
         end=end,
         coords=coords,
         variables=variables,
+        aggregation=aggregation,
     )
-
-    if args.output == 'stdout':
-        output = sys.stdout
-    else:
-        path = Path(args.output)
-        path.parent.mkdir(parents=True, exist_ok=True)
-        output = path.open('w')
-
-    with output as f:
-        f.write('DATE')
-        for cell in variables:
-            f.write(',')
-            f.write(cell)
+    dates = get_period_dates(begin, end, aggregation)
+
+    if write_binary := BINARY_WRITERS.get(args.format):
+        with _open_binary_output(args.output) as f:
+            write_binary(f, get_columns(data[np.newaxis], dates, variables))
+        return
+
+    with _open_text_output(args.output) as f:
+        if args.format == 'ndjson':
+            for items in iter_json_items(data, dates, variables, format_array):
+                f.write('\n'.join(items))
+                f.write('\n')
+        else:
+            _write_csv(f, data, dates, variables, format_array)
+
+
+def _open_binary_output(output: str) -> BinaryIO:
+    if output == 'stdout':
+        return sys.stdout.buffer
+    return _get_output_path(output).open('wb')
+
+
+def _open_text_output(output: str) -> TextIO:
+    if output == 'stdout':
+        return sys.stdout
+    return _get_output_path(output).open('w')
+
+
+def _get_output_path(output: str) -> Path:
+    path = Path(output)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _write_csv(
+    f: TextIO,
+    data: NDArray[np.float32],
+    dates: NDArray[np.datetime64],
+    variables: Sequence[str],
+    format_array: FormatArray,
+) -> None:
+    f.write('DATE')
+    for cell in variables:
+        f.write(',')
+        f.write(cell)
+    f.write('\n')
+    labels = dates.astype(str)
+    for start in range(0, len(labels), _BLOCK_ROWS):
+        stop = start + _BLOCK_ROWS
+        lines = labels[start:stop]
+        for column in format_array(data[:, start:stop]):
+            lines = lines + ',' + column
+        f.write('\n'.join(lines.tolist()))
         f.write('\n')
-        date_ = begin
-        for row in data.transpose():
-            f.write(f'{date_:%Y-%m-%d}')
-            date_ += const.ONE_DAY
-            for cell in row:
-                f.write(',')
-                f.write(format_float(cell))  # type: ignore[arg-type]
-            f.write('\n')
 
 
 def _print_vars(header: str, variables: Iterable[tuple[str, const.VarInfo]]) -> None:
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Protocol
+from weakref import WeakKeyDictionary
+
+from weatheasy.cache import decode_chunk
+from weatheasy.error import S3ImportError
+from weatheasy.metrics import STAGE_SECONDS, get_array_labels
+
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    import numpy as np
+    import s3fs
+    import zarr
+    from numpy.typing import NDArray
+
+    from weatheasy.cache import ChunkRequest
+
+
+class AsyncChunkReader(Protocol):
+    async def read_chunks(self, requests: Sequence[ChunkRequest]) -> list[NDArray[np.float32]]:
+        """Read and decode chunks of zarr arrays."""
+
+
+class S3ChunkReader:
+    """Read chunks of zarr arrays stored in S3 awaiting GET requests on the event loop.
+
+    `root` is the same as for `weatheasy.util.get_storage`. At most
+    `max_requests` GET requests are in flight at once per event loop.
+    """
+
+    def __init__(self, root: str, max_requests: int) -> None:
+        try:
+            import s3fs
+        except ImportError as exc:
+            raise S3ImportError from exc
+
+        self._s3fs = s3fs
+        self._root = root.removeprefix('s3://').rstrip('/')
+        self._max_requests = max_requests
+        self._clients: WeakKeyDictionary[
+            asyncio.AbstractEventLoop, tuple[s3fs.S3FileSystem, asyncio.Semaphore]
+        ] = WeakKeyDictionary()
+
+    async def read_chunks(self, requests: Sequence[ChunkRequest]) -> list[NDArray[np.float32]]:
+        loop = asyncio.get_running_loop()
+        if (client := self._clients.get(loop)) is None:
+            fs = self._s3fs.S3FileSystem(asynchronous=True, skip_instance_cache=True)
+            await fs.set_session()
+            client = self._clients[loop] = fs, asyncio.Semaphore(self._max_requests)
+        return await asyncio.gather(*(self._read_chunk(*client, *request) for request in requests))
+
+    async def _read_chunk(
+        self,
+        fs: s3fs.S3FileSystem,
+        semaphore: asyncio.Semaphore,
+        array: zarr.Array,
+        index: tuple[int, ...],
+    ) -> NDArray[np.float32]:
+        path = f'{self._root}/{array._chunk_key(index)}'  # noqa: SLF001
+        async with semaphore:
+            with STAGE_SECONDS.time(**get_array_labels(array.path), stage='fetch'):
+                try:
+                    cdata = await fs._cat_file(path)  # noqa: SLF001
+                except FileNotFoundError:
+                    cdata = None
+        return decode_chunk(array, index, cdata)
+
+
+def get_chunk_reader(root: str, max_requests: int) -> AsyncChunkReader | None:
+    """Get an async chunk reader for `root` if its storage supports async reads."""
+
+    if root.startswith('s3://'):
+        return S3ChunkReader(root, max_requests)
+    return None
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import monotonic
+from typing import TYPE_CHECKING, NamedTuple
+
+import numpy as np
+import zarr
+
+from weatheasy.metrics import (
+    CHUNK_CACHE_REQUESTS,
+    STAGE_SECONDS,
+    STORE_READ_BYTES,
+    get_array_labels,
+)
+from weatheasy.util import get_consolidated_stamp, get_store, open_consolidated
+
+
+if TYPE_CHECKING:
+    from collections.abc import Hashable, MutableMapping, Sequence
+
+    from numpy.typing import NDArray
+
+    from weatheasy.aio import AsyncChunkReader
+
+    type ChunkRequest = tuple[zarr.Array, tuple[int, ...]]
+
+
+DEFAULT_CACHE_SIZE = 256 * 2**20
+DEFAULT_FETCH_WORKERS = 16
+DEFAULT_METADATA_TTL = 60.0
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    size: int
+    max_size: int
+
+
+class ChunkCache:
+    """Byte-budgeted LRU cache of decoded zarr chunks.
+
+    Chunks are identified by store, array path and shape and chunk index.
+    Cached chunks of a dataset are dropped when the stamp passed to
+    `validate` for it changes, which is how downloads invalidate the cache.
+    Missing chunks requested with `get_many` are read concurrently by at
+    most `fetch_workers` threads.
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_CACHE_SIZE,
+        fetch_workers: int = DEFAULT_FETCH_WORKERS,
+    ) -> None:
+        self._max_size = max_size
+        self._fetch_workers = fetch_workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._stamps: dict[str, Hashable] = {}
+        self._chunks: OrderedDict[tuple, tuple[zarr.Array, NDArray[np.float32]]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, array: zarr.Array, index: tuple[int, ...]) -> NDArray[np.float32]:
+        chunk = self._lookup(array, index)
+        if chunk is None:
+            chunk = self._load(array, index)
+        return chunk
+
+    def get_many(self, requests: Sequence[ChunkRequest]) -> list[NDArray[np.float32]]:
+        chunks, missing = self._lookup_many(requests)
+        if len(missing) == 1:
+            for key, request in missing.items():
+                chunks[key] = self._load(*request)
+        elif missing:
+            executor = self._get_executor()
+            futures = {key: executor.submit(self._load, *req) for key, req in missing.items()}
+            for key, future in futures.items():
+                chunks[key] = future.result()
+
+        return [chunks[_key(*request)] for request in requests]
+
+    async def get_many_async(
+        self,
+        requests: Sequence[ChunkRequest],
+        reader: AsyncChunkReader,
+    ) -> list[NDArray[np.float32]]:
+        chunks, missing = self._lookup_many(requests)
+        if missing:
+            loaded = await reader.read_chunks(list(missing.values()))
+            for (key, (array, _)), chunk in zip(missing.items(), loaded, strict=True):
+                chunks[key] = self._put(key, array, chunk)
+
+        return [chunks[_key(*request)] for request in requests]
+
+    def validate(self, dataset: str, stamp: Hashable) -> None:
+        """Drop cached chunks of `dataset` unless `stamp` matches the one of the last call."""
+
+        with self._lock:
+            if dataset in self._stamps and self._stamps[dataset] == stamp:
+                return
+            for key in [key for key in self._chunks if key[1].partition('/')[0] == dataset]:
+                self._size -= self._chunks.pop(key)[1].nbytes
+            self._stamps[dataset] = stamp
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def cache_info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._size, self._max_size)
+
+    def _lookup(self, array: zarr.Array, index: tuple[int, ...]) -> NDArray[np.float32] | None:
+        key = _key(array, index)
+        with self._lock:
+            if (item := self._chunks.get(key)) is not None:
+                self._chunks.move_to_end(key)
+                self._hits += 1
+            else:
+                self._misses += 1
+        result = 'miss' if item is None else 'hit'
+        CHUNK_CACHE_REQUESTS.inc(**get_array_labels(array.path), result=result)
+        return None if item is None else item[1]
+
+    def _lookup_many(
+        self,
+        requests: Sequence[ChunkRequest],
+    ) -> tuple[dict[tuple, NDArray[np.float32]], dict[tuple, ChunkRequest]]:
+        chunks = {}
+        missing = {}
+        for request in requests:
+            key = _key(*request)
+            if key in chunks or key in missing:
+                continue
+            if (chunk := self._lookup(*request)) is None:
+                missing[key] = request
+            else:
+                chunks[key] = chunk
+        return chunks, missing
+
+    def _load(self, array: zarr.Array, index: tuple[int, ...]) -> NDArray[np.float32]:
+        with STAGE_SECONDS.time(**get_array_labels(array.path), stage='fetch'):
+            cdata = array.chunk_store.get(array._chunk_key(index))  # noqa: SLF001
+        return self._put(_key(array, index), array, decode_chunk(array, index, cdata))
+
+    def _put(
+        self,
+        key: tuple,
+        array: zarr.Array,
+        chunk: NDArray[np.float32],
+    ) -> NDArray[np.float32]:
+        if chunk.nbytes > self._max_size:
+            return chunk
+
+        with self._lock:
+            # The entry keeps a reference to the array, so the store id is not reused while cached
+            if (old := self._chunks.pop(key, None)) is not None:
+                self._size -= old[1].nbytes
+            self._chunks[key] = array, chunk
+            self._size += chunk.nbytes
+            while self._size > self._max_size:
+                _, (_, evicted) = self._chunks.popitem(last=False)
+                self._size -= evicted.nbytes
+
+        return chunk
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self._fetch_workers, thread_name_prefix='weatheasy-fetch'
+                )
+            return self._executor
+
+    def _clear(self) -> None:
+        self._chunks.clear()
+        self._size = 0
+
+
+class MetadataCache:
+    """Zarr storage opened from consolidated metadata kept in memory.
+
+    The consolidation stamp of the store is checked at most once in `ttl`
+    seconds and the metadata is reloaded when the stamp changes, so warm
+    queries read only data chunks. Stores without up to date consolidated
+    metadata are opened as usual.
+    """
+
+    def __init__(self, root: str, ttl: float = DEFAULT_METADATA_TTL) -> None:
+        self._store: MutableMapping = get_store(root)
+        self._ttl = ttl
+        self._storage: zarr.Group | None = None
+        self._stamp: str | None = None
+        self._checked = 0.0
+        self._lock = Lock()
+
+    @property
+    def storage(self) -> zarr.Group:
+        with self._lock:
+            now = monotonic()
+            if self._storage is None or now - self._checked >= self._ttl:
+                self._storage = self._refresh(self._storage)
+                self._checked = now
+            return self._storage
+
+    def _refresh(self, storage: zarr.Group | None) -> zarr.Group:
+        stamp = get_consolidated_stamp(self._store)
+        if storage is not None and stamp == self._stamp:
+            return storage
+        if (consolidated := open_consolidated(self._store, stamp)) is None:
+            # Retried on the next check if the store is being consolidated right now
+            self._stamp = None
+            return zarr.group(self._store)
+        self._stamp = stamp
+        return consolidated
+
+
+def decode_chunk(
+    array: zarr.Array,
+    index: tuple[int, ...],
+    cdata: bytes | None,
+) -> NDArray[np.float32]:
+    """Decode the chunk of `array` at `index` from bytes read from the store.
+
+    None stands for a chunk missing in the store, which is filled with the
+    fill value. Read bytes and decoding time are recorded in metrics.
+    """
+
+    shape = tuple(
+        min(size, total - i * size)
+        for size, total, i in zip(array.chunks, array.shape, index, strict=True)
+    )
+    if cdata is None:
+        return np.full(shape, array.fill_value, array.dtype)
+    labels = get_array_labels(array.path)
+    STORE_READ_BYTES.inc(len(cdata), **labels)
+    with STAGE_SECONDS.time(**labels, stage='decode'):
+        chunk = array._decode_chunk(cdata)  # noqa: SLF001
+    return chunk[tuple(slice(0, n) for n in shape)]
+
+
+def _key(array: zarr.Array, index: tuple[int, ...]) -> tuple:
+    # Chunks outlive the metadata of consolidated stores, which is reloaded on updates. Edge
+    # chunks are cut to the array shape, so they are not reused once the array is resized
+    return id(array.chunk_store), array.path, array.shape, index
+
+
+default_cache = ChunkCache()
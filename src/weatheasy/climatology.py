@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import warnings
+from typing import TYPE_CHECKING, Literal
+
+import numpy as np
+
+from weatheasy.rollup import get_days_of_year
+
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+
+type NormalStat = Literal['mean', 'std', 'p10', 'p50', 'p90']
+
+NORMAL_STATS: tuple[NormalStat, ...] = 'mean', 'std', 'p10', 'p50', 'p90'
+DAY_SLOTS = 366
+
+_PERCENTILES = 10, 50, 90
+_WINDOW = 2  # days on each side of a day pooled into its normals
+
+
+def get_day_slots(dates: NDArray[np.datetime64]) -> NDArray[np.int64]:
+    """Get days of year of `dates` counted as in a leap year.
+
+    So the same calendar day always has the same slot, and February 29 has
+    a slot of its own.
+    """
+
+    return get_days_of_year(dates, leap=True)
+
+
+def compute_normals(data: NDArray[np.float32], slots: NDArray[np.int64]) -> NDArray[np.float32]:
+    """Compute daily normals of `data` with days along the first axis.
+
+    Values of the days within `_WINDOW` days of a slot are pooled, missing
+    values are skipped. Returns an array of shape
+    `(len(NORMAL_STATS), DAY_SLOTS, *data.shape[1:])`.
+    """
+
+    res = np.full((len(NORMAL_STATS), DAY_SLOTS, *data.shape[1:]), np.nan, np.float32)
+    distance = np.abs(slots[np.newaxis] - np.arange(DAY_SLOTS)[:, np.newaxis])
+    pooled = np.minimum(distance, DAY_SLOTS - distance) <= _WINDOW
+    with warnings.catch_warnings():
+        # Cells without values, e.g. soil variables over the ocean, stay NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for slot, days in enumerate(pooled):
+            if not days.any():
+                continue
+            values = data[days]
+            res[0, slot] = np.nanmean(values, axis=0)
+            res[1, slot] = np.nanstd(values, axis=0)
+            res[2:, slot] = _percentiles(values)
+
+    return res
+
+
+def _percentiles(values: NDArray[np.float32]) -> NDArray[np.float64]:
+    """Linearly interpolated `_PERCENTILES` along the first axis skipping NaNs.
+
+    Unlike `np.nanpercentile` it stays vectorized when some cells have no
+    values at all.
+    """
+
+    values = np.sort(values, axis=0)  # NaNs go last
+    last = np.maximum(np.isfinite(values).sum(axis=0) - 1, 0)
+    res = np.empty((len(_PERCENTILES), *values.shape[1:]))
+    for i, q in enumerate(_PERCENTILES):
+        position = last * (q / 100)
+        below = np.floor(position).astype(np.intp)
+        above = np.minimum(below + 1, last)
+        low = np.take_along_axis(values, below[np.newaxis], axis=0)[0].astype(np.float64)
+        high = np.take_along_axis(values, above[np.newaxis], axis=0)[0].astype(np.float64)
+        res[i] = low + (high - low) * (position - below)
+
+    return res
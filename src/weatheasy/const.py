@@ -3,7 +3,18 @@ from datetime import date, timedelta
 from typing import NamedTuple
 
 import numpy as np
-from rasterio.coords import BoundingBox
+
+
+class BoundingBox(NamedTuple):
+    """Grid bounds like `rasterio.coords.BoundingBox`, which compares equal to it.
+
+    Defined here, so queries do not import rasterio.
+    """
+
+    left: float
+    bottom: float
+    right: float
+    top: float
 
 
 class VarInfo(NamedTuple):
@@ -18,10 +29,36 @@ class Cfs2Band(NamedTuple):
     info: VarInfo
 
 
+class Encoding(NamedTuple):
+    """Storage encoding of a variable.
+
+    Values are bit rounded to `keepbits` float32 mantissa bits (23 keeps
+    them intact) which gives a relative precision of 2**-(keepbits + 1).
+    Then they are shuffled and compressed with Blosc.
+    """
+
+    keepbits: int
+    cname: str = 'zstd'
+    clevel: int = 5
+    bitshuffle: bool = True
+
+
 ONE_DAY = timedelta(days=1)
 
+KEY_CONSOLIDATED = 'consolidated'
+
+TIMESERIES_DIR = 'ts'
+TIMESERIES_KEY_SYNCED = 'synced'
+TIMESERIES_CHUNKS = 2922, 10, 10
+
+ROLLUP_DIR = 'rollup'
+ROLLUP_KEY_SYNCED = 'synced'
+ROLLUP_CHUNKS = 512, 20, 20
+
 CFS2_DIR = 'cfs2'
 CFS2_KEY_UPDATED = 'updated'
+CFS2_KEY_FORECAST = 'forecast'
+CFS2_FORECAST_GENERATION_FORMAT = '%Y%m%dT%H%M%S'  # UTC time of the update
 CFS2_HHS = '00', '06', '12', '18'
 
 CFS2_REANALYSIS_DIR = CFS2_DIR + '/reanalysis'
@@ -30,6 +67,10 @@ CFS2_REANALYSIS_LAST_DATE_OFFSET = timedelta(days=3)
 CFS2_REANALYSIS_RESOLUTION = 0.5, 0.5
 CFS2_REANALYSIS_BBOX = BoundingBox(-180.25, -90.25, 179.75, 90.25)
 
+CFS2_CLIMATOLOGY_DIR = CFS2_DIR + '/climatology'
+CFS2_CLIMATOLOGY_KEY_YEARS = 'years'
+CFS2_CLIMATOLOGY_CHUNKS = 366, 20, 20
+
 CFS2_FORECAST_DIR = CFS2_DIR + '/forecast'
 CFS2_FORECAST_DAYS = timedelta(days=180)
 
@@ -204,6 +245,44 @@ CFS2_PGB_BANDS = {
 
 CFS2_BANDS = {**CFS2_FLX_BANDS, **CFS2_PGB_BANDS}
 
+TEMPERATURE_ENCODING = Encoding(keepbits=16)  # ~0.002 K at 300 K
+PRESSURE_ENCODING = Encoding(keepbits=18)  # ~0.2 Pa at 1000 hPa
+FLUX_ENCODING = Encoding(keepbits=14)  # ~0.03 W/m² at 1000 W/m²
+HUMIDITY_ENCODING = Encoding(keepbits=14)  # ~0.003 % at 100 %
+DEFAULT_ENCODING = Encoding(keepbits=12)  # ~0.01%
+
+CFS2_ENCODINGS = {
+    'DLWRF': FLUX_ENCODING,
+    'DSWRF': FLUX_ENCODING,
+    'GFLUX': FLUX_ENCODING,
+    'LHTFL': FLUX_ENCODING,
+    'PRATE': DEFAULT_ENCODING,
+    'PRES': PRESSURE_ENCODING,
+    'QMAX': DEFAULT_ENCODING,
+    'QMIN': DEFAULT_ENCODING,
+    'SHTFL': FLUX_ENCODING,
+    'SNOD': DEFAULT_ENCODING,
+    'SOILW_0-0.1m': DEFAULT_ENCODING,
+    'SOILW_0.1-0.4m': DEFAULT_ENCODING,
+    'SOILW_0.4-1m': DEFAULT_ENCODING,
+    'SOILW_1-2m': DEFAULT_ENCODING,
+    'SPFH': DEFAULT_ENCODING,
+    'TMAX': TEMPERATURE_ENCODING,
+    'TMIN': TEMPERATURE_ENCODING,
+    'TMP': TEMPERATURE_ENCODING,
+    'TMP_0m': TEMPERATURE_ENCODING,
+    'TMP_0_0.1m': TEMPERATURE_ENCODING,
+    'TMP_0.1_0.4m': TEMPERATURE_ENCODING,
+    'TMP_0.4_1m': TEMPERATURE_ENCODING,
+    'TMP_1-2m': TEMPERATURE_ENCODING,
+    'UGRD': DEFAULT_ENCODING,
+    'ULWRF': FLUX_ENCODING,
+    'USWRF': FLUX_ENCODING,
+    'VGRD': DEFAULT_ENCODING,
+    'WEASD': DEFAULT_ENCODING,
+    'RH': HUMIDITY_ENCODING,
+}
+
 CMIP6_DIR = 'cmip6'
 CMIP6_FIRST_YEAR = 1950
 CMIP6_LAST_YEAR = 2100
@@ -249,3 +328,15 @@ CMIP6_VARS = {
         ru='',
     ),
 }
+
+CMIP6_ENCODINGS = {
+    'hurs': HUMIDITY_ENCODING,
+    'huss': DEFAULT_ENCODING,
+    'pr': DEFAULT_ENCODING,
+    'rlds': FLUX_ENCODING,
+    'rsds': FLUX_ENCODING,
+    'sfcWind': DEFAULT_ENCODING,
+    'tas': TEMPERATURE_ENCODING,
+    'tasmin': TEMPERATURE_ENCODING,
+    'tasmax': TEMPERATURE_ENCODING,
+}
@@ -2,30 +2,54 @@ from __future__ import annotations
 
 import logging
 import math
+import multiprocessing
+import os
 import sys
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from contextlib import ExitStack, contextmanager
 from datetime import date, timedelta
-from itertools import product
+from functools import partial
+from itertools import chain, pairwise, product
 from pathlib import Path
 from queue import Queue
 from tempfile import TemporaryDirectory
 from threading import Thread
-from typing import TYPE_CHECKING, ClassVar
+from typing import TYPE_CHECKING, ClassVar, Literal
 
 import netCDF4 as nc
 import numpy as np
 import rasterio
 import zarr
 from requests import Session
-from requests.adapters import HTTPAdapter
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
 
 from weatheasy import const
-from weatheasy.util import get_storage, init_parser, utc_now
+from weatheasy.climatology import DAY_SLOTS, NORMAL_STATS, compute_normals, get_day_slots
+from weatheasy.rollup import ROLLUP_LEVELS, get_periods, mean_periods
+from weatheasy.util import (
+    consolidate_metadata,
+    encoding_kwargs,
+    get_cfs2_forecast_path,
+    get_storage,
+    init_parser,
+    utc_now,
+)
 
 
 if TYPE_CHECKING:
-    from rasterio.coords import BoundingBox
+    from collections.abc import Callable, Generator, Iterable, Iterator, Sequence
+    from concurrent.futures import Executor, Future
+
+    from numpy.typing import NDArray
+
+    from weatheasy.const import BoundingBox
+
+
+DEFAULT_TRANSFERS = 4
+DEFAULT_LOOK_AHEAD = 8
+DEFAULT_PREFETCH = 2
 
 
 def main(*, configure_logging: bool = True) -> None:
@@ -41,6 +65,38 @@ def main(*, configure_logging: bool = True) -> None:
         metavar='PATH',
         help='optional local path for persisted downloaded files',
     )
+    parser.add_argument(
+        '--timeseries',
+        action='store_true',
+        help='maintain a time series optimized copy of the data for fast point queries',
+    )
+    parser.add_argument(
+        '--transfers',
+        type=int,
+        default=DEFAULT_TRANSFERS,
+        metavar='INT',
+        help='maximum number of concurrent CFS2 reanalysis downloads',
+    )
+    parser.add_argument(
+        '--look-ahead',
+        type=int,
+        default=DEFAULT_LOOK_AHEAD,
+        metavar='DAYS',
+        help='how many CFS2 reanalysis days may be downloaded ahead of the stored one',
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        metavar='INT',
+        help='number of processes aggregating CFS2 reanalysis days (default: CPU count)',
+    )
+    parser.add_argument(
+        '--prefetch',
+        type=int,
+        default=DEFAULT_PREFETCH,
+        metavar='FILES',
+        help='how many CMIP6 yearly files may be downloaded ahead of the decoded one',
+    )
     parser.add_argument(
         'kind',
         choices=('cfs2', 'cmip6'),
@@ -48,19 +104,52 @@ def main(*, configure_logging: bool = True) -> None:
     args = parser.parse_args()
     match args.kind:
         case 'cfs2':
-            download = download_cfs2_data
+            download = partial(
+                download_cfs2_data,
+                transfers=args.transfers,
+                look_ahead=args.look_ahead,
+                workers=args.workers,
+            )
         case 'cmip6':
-            download = download_cmip6_data
+            download = partial(download_cmip6_data, prefetch=args.prefetch)
         case _:
             raise NotImplementedError
     root = get_storage(args.data)
-    download(root, args.download_dir)
+    try:
+        download(root, args.download_dir, timeseries=args.timeseries)
+    finally:
+        # Even after a failure, so readers see the data saved so far
+        _LOG.info('Consolidating metadata')
+        consolidate_metadata(root)
 
 
-def download_cfs2_data(root: zarr.Group, download_dir: Path | None = None) -> None:
+def download_cfs2_data(
+    root: zarr.Group,
+    download_dir: Path | None = None,
+    *,
+    timeseries: bool = False,
+    transfers: int = DEFAULT_TRANSFERS,
+    look_ahead: int = DEFAULT_LOOK_AHEAD,
+    workers: int | None = None,
+) -> None:
+    """Download missing CFS2 reanalysis days and update the forecast.
+
+    Up to `transfers` reanalysis files are downloaded at once for at most
+    `look_ahead` days ahead of the one being stored. Downloaded days are
+    aggregated by `workers` processes, all CPUs are used by default.
+    """
+
     group = root.require_group(const.CFS2_DIR)
     today = utc_now().date()
 
+    if timeseries:
+        reanalysis_group = root.require_group(const.CFS2_REANALYSIS_DIR)
+        reanalysis_days = 0
+        if last := reanalysis_group.attrs.get(_LAST):
+            reanalysis_days = (date.fromisoformat(last) - const.CFS2_REANALYSIS_FIRST_DATE).days + 1
+        _enable_timeseries(reanalysis_group, reanalysis_days)
+        _enable_timeseries(root.require_group(get_cfs2_forecast_path(group.attrs.asdict())))
+
     if updated := group.attrs.get(const.CFS2_KEY_UPDATED):
         time_since_updated = today - date.fromisoformat(updated)
         if time_since_updated < const.ONE_DAY:
@@ -72,7 +161,12 @@ def download_cfs2_data(root: zarr.Group, download_dir: Path | None = None) -> No
     forecast_end = yesterday + const.CFS2_FORECAST_DAYS
 
     with ExitStack() as stack:
-        session = stack.enter_context(_session())
+        session = stack.enter_context(_session(transfers))
+        workers = workers or os.cpu_count() or 1
+        # Workers are started lazily, by then download and upload threads run and forking
+        # this process could copy locks they hold. The fork server is a fresh process
+        mp_context = multiprocessing.get_context('forkserver')
+        executor = stack.enter_context(ProcessPoolExecutor(workers, mp_context=mp_context))
         if download_dir:
             reanalysis_dir = download_dir.joinpath(const.CFS2_REANALYSIS_DIR)
             reanalysis_dir.mkdir(parents=True, exist_ok=True)
@@ -81,62 +175,109 @@ def download_cfs2_data(root: zarr.Group, download_dir: Path | None = None) -> No
         else:
             reanalysis_dir = stack.enter_context(_temp_dir())
             forecast_dir = stack.enter_context(_temp_dir())
-        _download_cfs2_reanalysis(root, forecast_begin, session, reanalysis_dir)
+        _download_cfs2_reanalysis(
+            root,
+            forecast_begin,
+            session,
+            reanalysis_dir,
+            transfers,
+            look_ahead,
+            executor,
+            workers,
+        )
+        _update_cfs2_climatology(root, executor, workers)
         _download_cfs2_forecast(forecast_begin, yesterday, session, forecast_dir)
         _download_cfs2_forecast(yesterday, forecast_end, session, forecast_dir)
-        _merge_cfs2_forecast(root, forecast_begin, forecast_end, forecast_dir)
+        _merge_cfs2_forecast(
+            root, today, forecast_begin, forecast_end, forecast_dir, timeseries=timeseries
+        )
+
 
-    group.attrs[const.CFS2_KEY_UPDATED] = today.isoformat()
+def download_cmip6_data(
+    root: zarr.Group,
+    download_dir: Path | None = None,
+    *,
+    timeseries: bool = False,
+    prefetch: int = DEFAULT_PREFETCH,
+) -> None:
+    """Download missing CMIP6 years of every variable.
 
+    Up to `prefetch` yearly files are downloaded in background while the
+    current one is decoded and the four-year blocks are stored.
+    """
 
-def download_cmip6_data(root: zarr.Group, download_dir: Path | None = None) -> None:
     years_key = 'years'
 
     height, width = _get_size(const.CMIP6_RESOLUTION, const.CMIP6_BBOX)
     height += 1
     width += 1
 
-    total_days = (date(const.CMIP6_LAST_YEAR, 12, 31) - date(const.CMIP6_FIRST_YEAR, 1, 1)).days
+    first_date = date(const.CMIP6_FIRST_YEAR, 1, 1)
+    total_days = (date(const.CMIP6_LAST_YEAR, 12, 31) - first_date).days
     arr_shape = total_days, height, width
     arr_chunks = _FOUR_YEAR_DAYS, 100, 100
 
     group, download_dir = _process_args(const.CMIP6_DIR, root, download_dir)
+    if timeseries:
+        group.require_group(const.TIMESERIES_DIR)
     buffer = np.full((_FOUR_YEAR_DAYS, height, width), np.nan, np.float32)
 
-    with _session() as session:
-        for var in const.CMIP6_VARS:
-            array = group.require_dataset(
-                name=var,
-                shape=arr_shape,
-                dtype=np.float32,
-                chunks=arr_chunks,
-                fill_value=np.nan,
-            )
-            first_year: int = array.attrs.get(years_key, (None, const.CMIP6_FIRST_YEAR - 1))[1] + 1
-            total_day_offset = (date(first_year, 1, 1) - date(const.CMIP6_FIRST_YEAR, 1, 1)).days
+    arrays = {
+        var: group.require_dataset(
+            name=var,
+            shape=arr_shape,
+            dtype=np.float32,
+            chunks=arr_chunks,
+            fill_value=np.nan,
+            **encoding_kwargs(const.CMIP6_ENCODINGS[var]),
+        )
+        for var in const.CMIP6_VARS
+    }
+    first_years: dict[str, int] = {
+        var: array.attrs.get(years_key, (None, const.CMIP6_FIRST_YEAR - 1))[1] + 1
+        for var, array in arrays.items()
+    }
+
+    with ExitStack() as stack:
+        session = stack.enter_context(_session(prefetch))
+        keep_files = download_dir is not None
+        if download_dir is None:
+            download_dir = stack.enter_context(_temp_dir())
+        paths = _iter_cmip6_datasets(
+            download_dir,
+            [
+                (var, year)
+                for var, first_year in first_years.items()
+                for year in range(first_year, const.CMIP6_LAST_YEAR + 1)
+            ],
+            session,
+            prefetch,
+        )
+        stack.callback(paths.close)
+        for var, array in arrays.items():
+            first_year = first_years[var]
+            total_day_offset = (date(first_year, 1, 1) - first_date).days
+            _sync_timeseries(group, var, total_day_offset, total_day_offset)
+            _sync_rollups(group, var, first_date, total_day_offset, total_day_offset)
             for year in range(first_year, const.CMIP6_LAST_YEAR + 1, 4):
                 buffer[:] = 0
                 day_offset = 0
-                for next_year in range(year, min(year + 4, const.CMIP6_LAST_YEAR + 1)):
-                    filename, nc_bytes = _load_cmip6_dataset(download_dir, var, next_year, session)
-                    with nc.Dataset(filename, memory=nc_bytes, filling=False) as ds:
-                        resolution = float(ds.resolution_id.split(' ', 1)[0])
-                        lon = ds.variables['lon']
-                        lat = ds.variables['lat']
-                        bbox = float(lon[0]), float(lat[0]), float(lon[-1]), float(lat[-1])
-                        if resolution != const.CMIP6_RESOLUTION or bbox != const.CMIP6_BBOX:
-                            _LOG.critical('Unexpected shape or geo referencing %s', filename)
-                            sys.exit(1)
-                        data = ds.variables[var]
-                        day_count = data.shape[0]
-                        buffer[day_offset:day_offset + day_count] = (
-                            data[:].filled(fill_value=np.nan))  # fmt: skip
-                        day_offset += day_count
-                _LOG.info('Saving %s[%d:%d]', array.path, year, next_year)
+                last_year = min(year + 3, const.CMIP6_LAST_YEAR)
+                for _ in range(year, last_year + 1):
+                    path = next(paths)
+                    day_offset += _read_cmip6_dataset(path, var, buffer[day_offset:])
+                    if not keep_files:
+                        path.unlink()
+                _LOG.info('Saving %s[%d:%d]', array.path, year, last_year)
                 if day_offset != _FOUR_YEAR_DAYS:
                     day_offset -= 1
-                array[total_day_offset : total_day_offset + _FOUR_YEAR_DAYS] = buffer[:day_offset]
-                array.attrs[years_key] = const.CMIP6_FIRST_YEAR, next_year
+                last_day = total_day_offset + day_offset
+                with (
+                    _update_timeseries(group, var, total_day_offset, last_day),
+                    _update_rollups(group, var, first_date, total_day_offset, last_day),
+                ):
+                    array[total_day_offset:last_day] = buffer[:day_offset]
+                array.attrs[years_key] = const.CMIP6_FIRST_YEAR, last_year
                 total_day_offset += _FOUR_YEAR_DAYS
 
 
@@ -145,6 +286,11 @@ _FOUR_YEAR_DAYS = 1461
 _LAST = 'last'
 _LOG = logging.getLogger(_MODULE_NAME)
 _CFS2_DOWNLOADED_FILENAME_TEMPLATE = '{}{}{}.grb2'
+_CFS2_REANALYSIS_MESSAGES = sorted({band.reanalysis for band in const.CFS2_BANDS.values()})
+_CHUNK_SIZE = 2**20
+_CMIP6_READ_DAYS = 32
+_FORECAST_SLAB_DAYS = 16
+_ROLLUP_WINDOW_YEARS = 4
 
 
 def _process_args(group_name: str, root: zarr.Group, download_dir: Path | None):
@@ -155,9 +301,9 @@ def _process_args(group_name: str, root: zarr.Group, download_dir: Path | None):
     return group, download_dir
 
 
-def _session():
+def _session(pool_size: int = DEFAULT_POOLSIZE):
     s = Session()
-    s.mount('https://', HTTPAdapter(max_retries=3))
+    s.mount('https://', HTTPAdapter(pool_maxsize=max(pool_size, DEFAULT_POOLSIZE), max_retries=3))
     return s
 
 
@@ -172,6 +318,10 @@ def _download_cfs2_reanalysis(  # noqa: PLR0915
     end: date,
     session: Session,
     download_dir: Path,
+    transfers: int,
+    look_ahead: int,
+    executor: Executor,
+    workers: int,
 ):
     group = root.require_group(const.CFS2_REANALYSIS_DIR)
     if last := group.attrs.get(_LAST):
@@ -191,10 +341,12 @@ def _download_cfs2_reanalysis(  # noqa: PLR0915
     tmp_group = group.require_group('_tmp')
     tmp_arrays = list(_get_cfs2_arrays(tmp_group, array_shape, (1, height, width)))
 
-    download = _Cfs2ReanalysisDownloader(session, download_dir)
+    download = _Cfs2ReanalysisDownloader(session, download_dir, transfers, look_ahead)
 
     first_day = (date_ - const.CFS2_REANALYSIS_FIRST_DATE).days
     total_days = (end - const.CFS2_REANALYSIS_FIRST_DATE).days
+    for var, _ in arrays:
+        _sync_rollups(group, var, const.CFS2_REANALYSIS_FIRST_DATE, first_day, first_day)
 
     day0 = first_day % _FOUR_YEAR_DAYS
     # day0_ is used to continue interrupted downloads
@@ -206,17 +358,18 @@ def _download_cfs2_reanalysis(  # noqa: PLR0915
         day0_ = day0
 
     day1 = min(_FOUR_YEAR_DAYS, day0_ + total_days - first_day)
-    day_buffer_shape = len(const.CFS2_HHS), height, width
     last_success: date | None = None
 
     while date_ < end:
-        day_uploader = _Cfs2ReanalysisDayUploader(day_buffer_shape, tmp_group, tmp_arrays)
+        day_uploader = _Cfs2ReanalysisDayUploader(executor, workers, tmp_group, tmp_arrays)
         day_uploader.start()
+        days = download(date_, day1 - day0_)
         for day in range(day0_, day1):
             try:
-                paths = download(date_)
+                date_, paths = next(days)
             except Exception as err:
                 _LOG.critical(err)
+                days.close()
                 day_uploader.join()
                 sys.exit(1)
             if paths:
@@ -230,9 +383,13 @@ def _download_cfs2_reanalysis(  # noqa: PLR0915
         if last_success is None:
             _LOG.warning('Failed to download any reanalysis data')
             return
-        for (_, array), (_, tmp_array) in zip(arrays, tmp_arrays, strict=True):
+        for (var, array), (_, tmp_array) in zip(arrays, tmp_arrays, strict=True):
             _LOG.info('Saving %s[%d:%d]', array.path, first_day, last_day)
-            array[first_day:last_day] = tmp_array[day0:day1]
+            with (
+                _update_timeseries(group, var, first_day, last_day),
+                _update_rollups(group, var, const.CFS2_REANALYSIS_FIRST_DATE, first_day, last_day),
+            ):
+                array[first_day:last_day] = tmp_array[day0:day1]
             tmp_array[:] = 0.0
         first_day = last_day
         day0 = 0
@@ -244,6 +401,83 @@ def _download_cfs2_reanalysis(  # noqa: PLR0915
     tmp_group.clear()
 
 
+def _update_cfs2_climatology(root: zarr.Group, executor: Executor, workers: int) -> None:
+    """Compute daily normals of every CFS2 reanalysis variable over its complete years.
+
+    Percentiles can not be updated with new days, so the normals are
+    recomputed once a year when another year of reanalysis is complete.
+    Up to `workers` spatial tiles are read, computed and written at once by
+    `executor`.
+    """
+
+    reanalysis_group = root.require_group(const.CFS2_REANALYSIS_DIR)
+    if not (last := reanalysis_group.attrs.get(_LAST)):
+        return
+    first_date = const.CFS2_REANALYSIS_FIRST_DATE
+    first_year = (first_date - const.ONE_DAY).year + 1
+    last_year = (date.fromisoformat(last) + const.ONE_DAY).year - 1
+    if last_year < first_year:
+        return
+
+    group = root.require_group(const.CFS2_CLIMATOLOGY_DIR)
+    years = [first_year, last_year]
+    if group.attrs.get(const.CFS2_CLIMATOLOGY_KEY_YEARS) == years:
+        return
+
+    begin = (date(first_year, 1, 1) - first_date).days
+    end = (date(last_year + 1, 1, 1) - first_date).days
+    slots = get_day_slots(np.datetime64(first_date, 'D') + np.arange(begin, end))
+    for var in const.CFS2_BANDS:
+        array: zarr.Array = reanalysis_group[var]
+        _, height, width = array.shape
+        normals = [
+            group.require_group(stat).require_dataset(
+                name=var,
+                shape=(DAY_SLOTS, height, width),
+                dtype=array.dtype,
+                chunks=const.CFS2_CLIMATOLOGY_CHUNKS,
+                fill_value=np.nan,
+                compressor=array.compressor,
+                filters=array.filters,
+            )
+            for stat in NORMAL_STATS
+        ]
+        _LOG.info('Computing normals of %s for %d-%d', array.path, first_year, last_year)
+        _, tile_height, tile_width = array.chunks
+        pending: deque[Future[None]] = deque()
+        for y, x in product(range(0, height, tile_height), range(0, width, tile_width)):
+            tile = np.s_[y : y + tile_height, x : x + tile_width]
+            # Tiles are read and written by the workers, only references to arrays are pickled
+            pending.append(
+                executor.submit(_compute_tile_normals, array, normals, begin, end, tile, slots)
+            )
+            if len(pending) >= workers:
+                pending.popleft().result()
+        while pending:
+            pending.popleft().result()
+    group.attrs[const.CFS2_CLIMATOLOGY_KEY_YEARS] = years
+
+
+def _compute_tile_normals(
+    array: zarr.Array,
+    normals: Sequence[zarr.Array],
+    begin: int,
+    end: int,
+    tile: tuple[slice, slice],
+    slots: NDArray[np.int64],
+) -> None:
+    """Compute normals of a spatial tile of `array[begin:end]` and write them.
+
+    Tiles of the reanalysis chunks cover whole climatology chunks, so
+    workers never write the same chunk. The arrays must be in a store shared
+    by processes, a directory or S3.
+    """
+
+    values = compute_normals(array[begin:end, *tile], slots)
+    for normal, stat_values in zip(normals, values, strict=True):
+        normal[:, *tile] = stat_values
+
+
 def _download_cfs2_forecast(
     begin: date,
     end: date,
@@ -258,58 +492,158 @@ def _download_cfs2_forecast(
 
 def _merge_cfs2_forecast(
     root: zarr.Group,
+    updated: date,
     begin: date,
     end: date,
     download_dir: Path,
+    *,
+    timeseries: bool,
 ):
+    """Merge the forecast into a new generation and switch readers to it.
+
+    The update stamp and the generation are changed with a single attributes
+    write. The previous generation is kept for queries planned before the
+    switch, older ones are removed.
+    """
+
+    cfs2_group = root.require_group(const.CFS2_DIR)
+    cfs2_attrs = cfs2_group.attrs.asdict()
+    previous = cfs2_attrs.get(const.CFS2_KEY_FORECAST)
+    current = root.get(get_cfs2_forecast_path(cfs2_attrs))
+
     group = root.require_group(const.CFS2_FORECAST_DIR)
-    merge = _Cfs2ForecastMerger(group, download_dir, begin, end)
+    generation = utc_now().strftime(const.CFS2_FORECAST_GENERATION_FORMAT)
+    generation_group = group.create_group(generation, overwrite=True)
+    if timeseries or (current is not None and const.TIMESERIES_DIR in current):
+        generation_group.require_group(const.TIMESERIES_DIR)
+    merge = _Cfs2ForecastMerger(generation_group, download_dir, begin, end)
     merge('flx', const.CFS2_FLX_BANDS, const.CFS2_FLX_RESOLUTION, const.CFS2_FLX_BBOX)
     merge('pgb', const.CFS2_PGB_BANDS, const.CFS2_PGB_RESOLUTION, const.CFS2_PGB_BBOX)
 
+    cfs2_group.attrs.update(
+        {const.CFS2_KEY_UPDATED: updated.isoformat(), const.CFS2_KEY_FORECAST: generation}
+    )
+    _LOG.info('Switched forecast to %s', generation_group.path)
+
+    # Forecasts stored before generations are removed after the next update
+    if previous is not None:
+        for name in list(group):
+            if name not in {previous, generation}:
+                _LOG.info('Removing %s/%s', group.path, name)
+                del group[name]
+
 
 class _Cfs2ReanalysisDownloader:
-    def __init__(self, session: Session, download_dir: Path) -> None:
+    """Download the GRIB messages of `const.CFS2_BANDS` from 6-hourly reanalysis files.
+
+    Byte ranges of the messages are taken from the NOAA inventory (.idx) of
+    each file, so the downloaded files contain only the used messages in
+    their original order.
+    """
+
+    _base_url: ClassVar = (
+        'https://www.ncei.noaa.gov/data/climate-forecast-system/access/operational-analysis/'
+        '6-hourly-by-pressure/'
+    )
+
+    def __init__(
+        self,
+        session: Session,
+        download_dir: Path,
+        transfers: int = 1,
+        look_ahead: int = 1,
+    ) -> None:
         self._session = session
         self._download_dir = download_dir
+        self._transfers = transfers
+        self._look_ahead = max(look_ahead, 1)
 
-    def __call__(self, date_: date) -> list[Path] | None:
+    def __call__(
+        self, begin: date, days: int
+    ) -> Generator[tuple[date, list[Path] | None], None, None]:
+        """Download `days` days of reanalysis starting from `begin`.
+
+        Yields every date with its files in order, or with None if the date was
+        not found on the server. Up to `transfers` files are downloaded at once
+        for at most `look_ahead` days ahead of the yielded one.
+        """
+
+        executor = ThreadPoolExecutor(self._transfers, thread_name_prefix='weatheasy-download')
+        pending: deque[tuple[date, list[Future[Path | None]]]] = deque()
+        submitted = 0
+        try:
+            for day in range(days):
+                while submitted < min(days, day + self._look_ahead):
+                    date_ = begin + timedelta(days=submitted)
+                    futures = [
+                        executor.submit(self._download, date_, hhs) for hhs in const.CFS2_HHS
+                    ]
+                    pending.append((date_, futures))
+                    submitted += 1
+                date_, futures = pending.popleft()
+                paths = [future.result() for future in futures]
+                yield date_, None if None in paths else paths  # type: ignore[misc]
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def _download(self, date_: date, hhs: str) -> Path | None:
         ymd = date_.strftime('%Y%m%d')
         ym = ymd[:-2]
         subdir = self._download_dir / ym
         subdir.mkdir(exist_ok=True)
-        url_template = (
-            'https://www.ncei.noaa.gov/data/climate-forecast-system/access/operational-analysis/6-hourly-by-pressure/'
-            f'{date_.year}/{ym}/{ymd}/cdas1.t{{}}z.pgrbh00.grib2'
-        )
-        paths = []
-        for hhs in const.CFS2_HHS:
-            path = subdir / f'{ymd}.cdas1.t{hhs}z.pgrbh00.grib2'
-            if not path.is_file():
-                url = url_template.format(hhs)
-                _LOG.info('Downloading %s', url)
-                with self._session.get(url, timeout=180) as response:
-                    if response.status_code == 404:
-                        return None
-                    if not response.ok:
-                        msg = f'Failed to download {url}'
-                        raise RuntimeError(msg)
-                    _LOG.info('Writing %s', path)
-                    path.write_bytes(response.content)
-            paths.append(path)
-        return paths
+        path = subdir / f'{ymd}.cdas1.t{hhs}z.pgrbh00.grib2'
+        if path.is_file():
+            return path
+
+        url = f'{self._base_url}{date_.year}/{ym}/{ymd}/cdas1.t{hhs}z.pgrbh00.grib2'
+        with self._session.get(url + '.idx', timeout=180) as response:
+            if response.status_code == 404:
+                return None
+            if not response.ok:
+                msg = f'Failed to download {response.url}'
+                raise RuntimeError(msg)
+            ranges = _get_message_ranges(response.text, _CFS2_REANALYSIS_MESSAGES)
+
+        if ranges is None:
+            _LOG.warning('Unexpected inventory of %s, downloading the whole file', url)
+            ranges = [(0, None)]
+        _LOG.info('Downloading %s (%d byte ranges)', url, len(ranges))
+        _write_chunks(path, self._iter_ranges(url, ranges))
+        _LOG.info('Written %s', path)
+        return path
+
+    def _iter_ranges(self, url: str, ranges: list[tuple[int, int | None]]) -> Iterator[bytes]:
+        for begin, end in ranges:
+            # The whole file is requested without a range, servers answer it with 200
+            headers: dict[str, str] = {}
+            status = 200
+            if (begin, end) != (0, None):
+                headers['Range'] = f'bytes={begin}-{"" if end is None else end - 1}'
+                status = 206
+            with self._session.get(url, headers=headers, timeout=180, stream=True) as response:
+                if response.status_code != status:
+                    msg = f'Failed to download {url} {headers.get("Range", "")}'.rstrip()
+                    raise RuntimeError(msg)
+                yield from response.iter_content(_CHUNK_SIZE)
 
 
 class _Cfs2ReanalysisDayUploader(Thread):
+    """Aggregate reanalysis days in `executor` and save them in order.
+
+    At most `window` days are aggregated at once.
+    """
+
     def __init__(
         self,
-        buffer_shape: tuple[int, int, int],
+        executor: Executor,
+        window: int,
         group: zarr.Group,
         arrays: list[tuple[str, zarr.Array]],
     ) -> None:
         super().__init__()
         self._queue: Queue[tuple[int, list[Path]] | None] = Queue()
-        self._buffer = np.full(buffer_shape, np.nan, np.float32)
+        self._executor = executor
+        self._window = max(window, 1)
         self._group = group
         self._arrays = arrays
 
@@ -321,32 +655,49 @@ class _Cfs2ReanalysisDayUploader(Thread):
         super().join(timeout)
 
     def run(self) -> None:
+        variables = [var for var, _ in self._arrays]
+        pending: deque[tuple[int, Future[NDArray[np.float32]]]] = deque()
         while task := self._queue.get():
-            self._upload_day(*task)
-
-    def _upload_day(self, day: int, paths: list[Path]):
-        buffer = self._buffer
-        with ExitStack() as stack:
-            dss: list[rasterio.DatasetReader] = []
-            for path in paths:
-                ds = stack.enter_context(rasterio.open(path, sharing=True))
-                if (
-                    ds.res != const.CFS2_REANALYSIS_RESOLUTION
-                    or ds.bounds != const.CFS2_REANALYSIS_BBOX
-                ):
-                    err = f'Unexpected shape or geo referencing {path}'
-                    raise ValueError(err)
-                dss.append(ds)
-            for var, array in self._arrays:
-                buffer[:] = np.nan
-                var_bands = const.CFS2_BANDS[var]
-                for i, ds in enumerate(dss):
-                    ds.read(var_bands.reanalysis, out=buffer[i])
-                _LOG.info('Saving %s[%d]', array.path, day)
-                array[day] = var_bands.daily_stat(buffer, axis=0)
+            day, paths = task
+            future = self._executor.submit(_aggregate_cfs2_reanalysis_day, paths, variables)
+            pending.append((day, future))
+            while pending and (len(pending) >= self._window or pending[0][1].done()):
+                self._upload_day(*pending.popleft())
+        while pending:
+            self._upload_day(*pending.popleft())
+
+    def _upload_day(self, day: int, future: Future[NDArray[np.float32]]) -> None:
+        for (_, array), data in zip(self._arrays, future.result(), strict=True):
+            _LOG.info('Saving %s[%d]', array.path, day)
+            array[day] = data
         self._group.attrs[_LAST] = day
 
 
+def _aggregate_cfs2_reanalysis_day(paths: list[Path], variables: list[str]) -> NDArray[np.float32]:
+    """Compute daily values of `variables` from 6-hourly reanalysis files.
+
+    Runs in worker processes. Returns an array of shape `(variables, h, w)`.
+    """
+
+    with ExitStack() as stack:
+        dss: list[rasterio.DatasetReader] = []
+        for path in paths:
+            ds = stack.enter_context(rasterio.open(path, sharing=True))
+            if (
+                ds.res != const.CFS2_REANALYSIS_RESOLUTION
+                or ds.bounds != const.CFS2_REANALYSIS_BBOX
+            ):
+                err = f'Unexpected shape or geo referencing {path}'
+                raise ValueError(err)
+            dss.append(ds)
+        reduce = _Cfs2DailyReducer(
+            [const.CFS2_BANDS[var] for var in variables], 'reanalysis', dss[0].shape
+        )
+        result = np.empty((len(variables), *dss[0].shape), np.float32)
+        reduce(dss, result, _get_reanalysis_band)
+    return result
+
+
 class _Cfs2ForecastDownloader:
     _base_url: ClassVar = 'https://nomads.ncep.noaa.gov/cgi-bin/'
     _min_interval: ClassVar = 1.0 / 3.0
@@ -377,18 +728,32 @@ class _Cfs2ForecastDownloader:
             self._last_call = time.time()
             _LOG.info('Downloading %s', file)
             params['file'] = file
-            with self._session.get(url, params=params, timeout=180) as response:
+            with self._session.get(url, params=params, timeout=180, stream=True) as response:
                 if response.ok:
-                    if response.content.startswith(b'<!doctype html>'):
+                    chunks = response.iter_content(_CHUNK_SIZE)
+                    head = next(chunks, b'')
+                    if head.startswith(b'<!doctype html>'):
                         _LOG.critical('Exceeded overrate limit for nomads.ncep.noaa.gov')
                         sys.exit(1)
                     _LOG.info('Writing %s', path)
-                    path.write_bytes(response.content)
+                    _write_chunks(path, chain((head,), chunks))
                 else:
                     _LOG.critical('Failed to download %s', response.url)
 
 
 class _Cfs2ForecastMerger:
+    """Merge downloaded 6-hourly forecast files into daily arrays.
+
+    Days are processed in slabs of `_FORECAST_SLAB_DAYS`, every slab is
+    written as soon as it is computed. Only the files of one day are open at
+    a time, so memory use and open files do not depend on the horizon.
+
+    Arrays keep a single chunk along time, so a point query over the whole
+    horizon reads one chunk per variable. Every slab rewrites the chunks it
+    falls into, which costs the daily merge more writes than slab-sized
+    chunks would.
+    """
+
     def __init__(
         self,
         group: zarr.Group,
@@ -408,43 +773,91 @@ class _Cfs2ForecastMerger:
         resolution: tuple[float, float],
         bbox: BoundingBox,
     ) -> None:
-        with ExitStack() as stack:
-            day_dss = []
-            for date_str in _cfs2_forecast_dates(self._begin, self._end):
-                hhs_dss = []
-                for hhs in const.CFS2_HHS:
-                    path = self._download_dir / _CFS2_DOWNLOADED_FILENAME_TEMPLATE.format(
-                        kind, date_str, hhs
-                    )
-                    if path.is_file():
-                        ds = stack.enter_context(rasterio.open(path))
-                        if ds.res != resolution or ds.bounds != bbox:
-                            _LOG.critical('Unexpected shape or geo referencing %s', path)
-                            sys.exit(1)
-                        hhs_dss.append(ds)
-                day_dss.append(hhs_dss)
-
-            height, width = _get_size(resolution[0], bbox)
-            day_buffer_shape = len(const.CFS2_HHS), height, width
-            day_buffer = np.full(day_buffer_shape, np.nan, np.float32)
-            var_buffer_shape = (self._end - self._begin).days, height, width
-            var_buffer = np.full(var_buffer_shape, np.nan, np.float32)
-
-            for var, var_bands in bands.items():
-                var_buffer[:] = np.nan
-                for day, hhs_dss in enumerate(day_dss):
-                    day_buffer[:] = np.nan
-                    for i, ds in enumerate(hhs_dss):
-                        ds.read(var_bands.forecast, out=day_buffer[i])
-                    var_buffer[day] = var_bands.daily_stat(day_buffer, axis=0)
-                array = self._group.array(
-                    name=var,
-                    data=var_buffer,
-                    chunks=(None, 100, 100),
-                    overwrite=True,
-                    fill_value=np.nan,
-                )
-                _LOG.info('Saved %s', array.path)
+        height, width = _get_size(resolution[0], bbox)
+        days = (self._end - self._begin).days
+        arrays = [
+            self._group.create_dataset(
+                name=var,
+                shape=(days, height, width),
+                dtype=np.float32,
+                chunks=(None, 100, 100),
+                overwrite=True,
+                fill_value=np.nan,
+                **encoding_kwargs(const.CFS2_ENCODINGS[var]),
+            )
+            for var in bands
+        ]
+        reduce = _Cfs2DailyReducer(list(bands.values()), 'forecast', (height, width))
+        slab = np.full((len(bands), _FORECAST_SLAB_DAYS, height, width), np.nan, np.float32)
+        dates = list(_cfs2_forecast_dates(self._begin, self._end))
+
+        for begin in range(0, days, _FORECAST_SLAB_DAYS):
+            end = min(begin + _FORECAST_SLAB_DAYS, days)
+            slab[:] = np.nan
+            for day in range(begin, end):
+                with ExitStack() as stack:
+                    dss = []
+                    for hhs in const.CFS2_HHS:
+                        path = self._download_dir / _CFS2_DOWNLOADED_FILENAME_TEMPLATE.format(
+                            kind, dates[day], hhs
+                        )
+                        if path.is_file():
+                            ds = stack.enter_context(rasterio.open(path))
+                            if ds.res != resolution or ds.bounds != bbox:
+                                _LOG.critical('Unexpected shape or geo referencing %s', path)
+                                sys.exit(1)
+                            dss.append(ds)
+                    reduce(dss, slab[:, day - begin])
+            for var, array, data in zip(bands, arrays, slab, strict=True):
+                with _update_timeseries(self._group, var, begin, end):
+                    array[begin:end] = data[: end - begin]
+                _LOG.info('Saved %s[%d:%d]', array.path, begin, end)
+
+
+class _Cfs2DailyReducer:
+    """Compute daily values of `bands` from 6-hourly datasets.
+
+    Every dataset is read once with all the needed bands, then bands with
+    the same daily statistic are reduced together.
+    """
+
+    def __init__(
+        self,
+        bands: Sequence[const.Cfs2Band],
+        kind: Literal['forecast', 'reanalysis'],
+        shape: tuple[int, int],
+    ) -> None:
+        indexes = [getattr(band, kind) for band in bands]
+        self._indexes = sorted(set(indexes))
+        groups: dict[Callable, tuple[list[int], list[int]]] = {}
+        for i, (index, band) in enumerate(zip(indexes, bands, strict=True)):
+            outs, positions = groups.setdefault(band.daily_stat, ([], []))
+            outs.append(i)
+            positions.append(self._indexes.index(index))
+        self._groups = list(groups.items())
+        self._block = np.empty((len(const.CFS2_HHS), len(self._indexes), *shape), np.float32)
+
+    def __call__(
+        self,
+        dss: Sequence[rasterio.DatasetReader],
+        out: NDArray[np.float32],
+        get_band: Callable[[rasterio.DatasetReader, int], int] | None = None,
+    ) -> None:
+        """Write daily values of `dss` to `out` of shape `(bands, h, w)`.
+
+        Missing datasets are NaN. `get_band` maps the indexes of the bands to
+        the ones of a dataset.
+        """
+
+        block = self._block
+        block[:] = np.nan
+        for i, ds in enumerate(dss):
+            indexes = self._indexes
+            if get_band is not None:
+                indexes = [get_band(ds, index) for index in indexes]
+            ds.read(indexes, out=block[i])
+        for stat, (outs, positions) in self._groups:
+            out[outs] = stat(block[:, positions], axis=0)
 
 
 def _get_cfs2_arrays(group: zarr.Group, shape: tuple[int, int, int], chunks: tuple[int, int, int]):
@@ -460,10 +873,196 @@ def _get_cfs2_arrays(group: zarr.Group, shape: tuple[int, int, int], chunks: tup
                 dtype=np.float32,
                 chunks=chunks,
                 fill_value=np.nan,
+                **encoding_kwargs(const.CFS2_ENCODINGS[var]),
             )
         yield var, array
 
 
+def _get_message_ranges(
+    inventory: str,
+    messages: Sequence[int],
+) -> list[tuple[int, int | None]] | None:
+    """Get merged byte ranges of sorted GRIB `messages` from a NOAA inventory (.idx).
+
+    The end of the last range is None if it lasts up to the end of the file.
+    Returns None if the inventory does not list messages one by one.
+    """
+
+    offsets: list[int | None] = []
+    for line in inventory.splitlines():
+        if line:
+            fields = line.split(':', 2)
+            if len(fields) < 3 or fields[0] != str(len(offsets) + 1) or not fields[1].isdigit():
+                return None
+            offsets.append(int(fields[1]))
+    if not messages or messages[-1] > len(offsets):
+        return None
+    offsets.append(None)
+
+    ranges: list[tuple[int, int | None]] = []
+    for message in messages:
+        begin, end = offsets[message - 1], offsets[message]
+        if ranges and ranges[-1][1] == begin:
+            ranges[-1] = ranges[-1][0], end
+        else:
+            ranges.append((begin, end))  # type: ignore[arg-type]
+    return ranges
+
+
+def _get_reanalysis_band(ds: rasterio.DatasetReader, message: int) -> int:
+    """Get the band of a GRIB `message` in a whole reanalysis file or in its downloaded part."""
+
+    if ds.count == len(_CFS2_REANALYSIS_MESSAGES):
+        return _CFS2_REANALYSIS_MESSAGES.index(message) + 1
+    return message
+
+
+def _enable_timeseries(group: zarr.Group, days: int | None = None) -> None:
+    """Create a time series optimized copy of `group` and catch it up with stored data.
+
+    `days` is the number of leading days stored in every array of `group`, the
+    whole arrays are copied if it is not set.
+    """
+
+    group.require_group(const.TIMESERIES_DIR)
+    for var, array in group.arrays():
+        end = array.shape[0] if days is None else days
+        _sync_timeseries(group, var, end, end)
+
+
+@contextmanager
+def _update_timeseries(group: zarr.Group, var: str, begin: int, end: int):
+    """Keep the time series optimized copy in sync with writing `group[var][begin:end]`.
+
+    Readers fall back to the source array until the copy is updated.
+    """
+
+    ts_array = group.get(f'{const.TIMESERIES_DIR}/{var}')
+    if ts_array is not None and ts_array.attrs.get(const.TIMESERIES_KEY_SYNCED, 0) > begin:
+        ts_array.attrs[const.TIMESERIES_KEY_SYNCED] = begin
+    yield
+    _sync_timeseries(group, var, begin, end)
+
+
+def _sync_timeseries(group: zarr.Group, var: str, begin: int, end: int) -> None:
+    """Copy `group[var][begin:end]` to the time series optimized copy if it is enabled.
+
+    The copy has small spatial tiles and a long time axis, so a point query
+    reads a few small chunks instead of whole spatial tiles of the source.
+    Days after `end` must not be written to the source yet. The `synced`
+    attribute of the copy tells readers how many leading days match the
+    source, days between it and `begin` are copied too.
+    """
+
+    ts_group = group.get(const.TIMESERIES_DIR)
+    if ts_group is None:
+        return
+
+    array: zarr.Array = group[var]
+    ts_array = ts_group.get(var)
+    if ts_array is None:
+        ts_array = ts_group.require_dataset(
+            name=var,
+            shape=array.shape,
+            dtype=array.dtype,
+            chunks=const.TIMESERIES_CHUNKS,
+            fill_value=np.nan,
+            compressor=array.compressor,
+            filters=array.filters,
+            write_empty_chunks=False,
+        )
+    elif ts_array.shape != array.shape:
+        ts_array.resize(*array.shape)
+
+    begin = min(begin, ts_array.attrs.get(const.TIMESERIES_KEY_SYNCED, 0))
+    end = min(end, array.shape[0])
+    if begin < end:
+        _LOG.info('Copying %s[%d:%d] to %s', array.path, begin, end, ts_array.path)
+        _, height, width = array.shape
+        _, tile_height, tile_width = array.chunks
+        time_step = const.TIMESERIES_CHUNKS[0]
+        block_begin = begin
+        while block_begin < end:
+            block_end = min(end, block_begin - block_begin % time_step + time_step)
+            for y, x in product(range(0, height, tile_height), range(0, width, tile_width)):
+                block = np.s_[block_begin:block_end, y : y + tile_height, x : x + tile_width]
+                ts_array[block] = array[block]
+            block_begin = block_end
+
+    ts_array.attrs[const.TIMESERIES_KEY_SYNCED] = array.shape[0]
+
+
+@contextmanager
+def _update_rollups(group: zarr.Group, var: str, origin: date, begin: int, end: int):
+    """Keep rollups of `group[var]` in sync with writing `group[var][begin:end]`.
+
+    Readers average daily values until the rollups are updated.
+    """
+
+    for level in ROLLUP_LEVELS:
+        rollup = group.get(f'{const.ROLLUP_DIR}/{level}/{var}')
+        if rollup is not None and rollup.attrs.get(const.ROLLUP_KEY_SYNCED, 0) > begin:
+            rollup.attrs[const.ROLLUP_KEY_SYNCED] = begin
+    yield
+    _sync_rollups(group, var, origin, begin, end)
+
+
+def _sync_rollups(group: zarr.Group, var: str, origin: date, begin: int, end: int) -> None:
+    """Update pentad, month and year means of `group[var]` with its days `[begin, end)`.
+
+    `origin` is the date of the first day of `group[var]`, periods are
+    numbered from the start of its year. Days after `end` must not be written
+    to the source yet. The `synced` attribute of a rollup tells readers how
+    many leading days of the source it includes, days between it and `begin`
+    are included too.
+    """
+
+    array: zarr.Array = group[var]
+    dates = np.datetime64(origin, 'D') + np.arange(array.shape[0])
+    rollups: list[tuple[zarr.Array, NDArray[np.int64]]] = []
+    for level in ROLLUP_LEVELS:
+        periods = get_periods(dates, level, origin.year)
+        shape = (int(periods[-1]) + 1, *array.shape[1:])
+        rollup_group = group.require_group(f'{const.ROLLUP_DIR}/{level}')
+        rollup = rollup_group.get(var)
+        if rollup is None:
+            rollup = rollup_group.require_dataset(
+                name=var,
+                shape=shape,
+                dtype=array.dtype,
+                chunks=const.ROLLUP_CHUNKS,
+                fill_value=np.nan,
+                compressor=array.compressor,
+                filters=array.filters,
+                write_empty_chunks=False,
+            )
+        elif rollup.shape != shape:
+            rollup.resize(*shape)
+        begin = min(begin, rollup.attrs.get(const.ROLLUP_KEY_SYNCED, 0))
+        rollups.append((rollup, periods))
+
+    end = min(end, array.shape[0])
+    if begin < end:
+        _LOG.info('Updating rollups of %s[%d:%d]', array.path, begin, end)
+        # Windows start with years, so every period is averaged within a single window
+        years = rollups[-1][1]
+        first_years = np.arange(years[begin], years[end - 1] + 1, _ROLLUP_WINDOW_YEARS)
+        bounds = [*np.searchsorted(years, first_years).tolist(), end]
+        _, height, width = array.shape
+        _, tile_height, tile_width = array.chunks
+        for window_begin, window_end in pairwise(bounds):
+            for y, x in product(range(0, height, tile_height), range(0, width, tile_width)):
+                tile = np.s_[y : y + tile_height, x : x + tile_width]
+                block = array[window_begin:window_end, *tile]
+                for rollup, periods in rollups:
+                    window = periods[window_begin:window_end]
+                    means = mean_periods(block, window, axis=0)
+                    rollup[window[0] : window[-1] + 1, *tile] = means
+
+    for rollup, _ in rollups:
+        rollup.attrs[const.ROLLUP_KEY_SYNCED] = end
+
+
 def _cfs2_forecast_dates(date_: date, end: date):
     while date_ < end:
         yield date_.strftime('%Y%m%d')
@@ -477,14 +1076,11 @@ def _get_size(resolution: float, bbox: BoundingBox) -> tuple[int, int]:
     )
 
 
-def _load_cmip6_dataset(path: Path | None, var: str, year: int, session: Session):
-    filename = f'{var}_{year}.nc'
-    if path:
-        path /= filename
-
-    if path and path.is_file():
+def _load_cmip6_dataset(download_dir: Path, var: str, year: int, session: Session) -> Path:
+    path = download_dir / f'{var}_{year}.nc'
+    if path.is_file():
         _LOG.info('Reading %s', path)
-        return filename, path.read_bytes()
+        return path
 
     kind = 'historical' if year <= const.CMIP6_LAST_HISTORICAL_YEAR else 'ssp245'
     url = (
@@ -492,15 +1088,73 @@ def _load_cmip6_dataset(path: Path | None, var: str, year: int, session: Session
         f'{kind}/r1i1p1f1/{var}/{var}_day_ACCESS-CM2_{kind}_r1i1p1f1_gn_{year}.nc'
     )
     _LOG.info('Downloading %s', url)
-    with session.get(url, timeout=180) as response:
+    with session.get(url, timeout=180, stream=True) as response:
         if not response.ok:
             _LOG.critical('Failed to download %s', url)
             sys.exit(1)
-        if path:
-            _LOG.info('Writing %s', path)
-            path.write_bytes(response.content)
+        _LOG.info('Writing %s', path)
+        _write_chunks(path, response.iter_content(_CHUNK_SIZE))
+
+    return path
+
+
+def _iter_cmip6_datasets(
+    download_dir: Path,
+    files: Sequence[tuple[str, int]],
+    session: Session,
+    prefetch: int,
+) -> Generator[Path, None, None]:
+    """Download CMIP6 `files` given as variable and year pairs.
+
+    Yields paths in order. Up to `prefetch` files following the yielded one
+    are downloaded in background meanwhile.
+    """
+
+    executor = ThreadPoolExecutor(max(prefetch, 1), thread_name_prefix='weatheasy-download')
+    pending: deque[Future[Path]] = deque()
+    try:
+        for var, year in files:
+            pending.append(executor.submit(_load_cmip6_dataset, download_dir, var, year, session))
+            if len(pending) > prefetch:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def _read_cmip6_dataset(path: Path, var: str, out: NDArray[np.float32]) -> int:
+    """Read daily `var` data from the NetCDF file at `path` into `out`.
+
+    The data is read in slabs of days, so memory usage does not depend on
+    the file size. Returns the number of days read.
+    """
+
+    with nc.Dataset(path) as ds:
+        resolution = float(ds.resolution_id.split(' ', 1)[0])
+        lon = ds.variables['lon']
+        lat = ds.variables['lat']
+        bbox = float(lon[0]), float(lat[0]), float(lon[-1]), float(lat[-1])
+        if resolution != const.CMIP6_RESOLUTION or bbox != const.CMIP6_BBOX:
+            _LOG.critical('Unexpected shape or geo referencing %s', path)
+            sys.exit(1)
+        data = ds.variables[var]
+        day_count = data.shape[0]
+        for begin in range(0, day_count, _CMIP6_READ_DAYS):
+            end = min(begin + _CMIP6_READ_DAYS, day_count)
+            out[begin:end] = data[begin:end].filled(fill_value=np.nan)
+
+    return day_count
+
+
+def _write_chunks(path: Path, chunks: Iterable[bytes]) -> None:
+    """Write `chunks` to `path` atomically so interrupted downloads leave no partial files."""
 
-    return filename, response.content
+    part_path = path.with_name(path.name + '.part')
+    with part_path.open('wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+    part_path.replace(path)
 
 
 if __name__ == '__main__':
@@ -6,9 +6,8 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from datetime import date
 
-    from rasterio.coords import BoundingBox
-
-    from weatheasy import Coords
+    from weatheasy import Area, Coords
+    from weatheasy.const import BoundingBox
 
 
 class S3ImportError(ImportError):
@@ -16,11 +15,22 @@ class S3ImportError(ImportError):
         super().__init__('To work with S3 storage install s3fs or weatheasy[s3]', name='s3fs')
 
 
+class ArrowImportError(ImportError):
+    def __init__(self) -> None:
+        super().__init__('To write Arrow IPC install pyarrow or weatheasy[arrow]', name='pyarrow')
+
+
 class CFS2Error(RuntimeError):
     def __init__(self) -> None:
         super().__init__('CFS2 datasets not found')
 
 
+class CFS2ClimatologyError(RuntimeError):
+    def __init__(self, variable: str | None = None) -> None:
+        of = '' if variable is None else f' of {variable}'
+        super().__init__(f'CFS2 climatology{of} not found')
+
+
 class BaseValueError(ValueError): ...
 
 
@@ -29,6 +39,11 @@ class CoordsError(BaseValueError):
         super().__init__(f'{coords} are out of {bbox}')
 
 
+class AreaError(BaseValueError):
+    def __init__(self, area: Area) -> None:
+        super().__init__(f'{area} is not a valid area')
+
+
 class DateRangeError(BaseValueError):
     def __init__(self) -> None:
         super().__init__('first date must be less than or equal to last')
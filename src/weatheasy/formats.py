@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from weatheasy.error import ArrowImportError
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator, Sequence
+    from typing import BinaryIO
+
+    from numpy.typing import NDArray
+
+    from weatheasy import Coords
+    from weatheasy.util import FormatArray
+
+    type Columns = dict[str, NDArray]
+
+
+MEDIA_TYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'npy': 'application/x-npy',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+_BLOCK_ROWS = 1024
+
+
+def iter_json_items(
+    data: NDArray[np.float32],
+    dates: NDArray[np.datetime64],
+    variables: Sequence[str],
+    format_array: FormatArray,
+    prefix: str = '{',
+) -> Iterator[list[str]]:
+    """Yield blocks of items formatted as JSON objects, one per date of `dates`.
+
+    `data` has shape `(len(variables), len(dates))`. Every object starts with
+    `prefix`, so it may carry additional members.
+    """
+
+    labels = dates.astype(str)
+    for start in range(0, len(labels), _BLOCK_ROWS):
+        stop = start + _BLOCK_ROWS
+        items = prefix
+        for var, column in zip(variables, format_array(data[:, start:stop]), strict=False):
+            items = items + f'"{var}":' + column + ','
+        yield (items + '"date":"' + labels[start:stop] + '"}').tolist()
+
+
+def get_columns(
+    data: NDArray[np.float32],
+    dates: NDArray[np.datetime64],
+    variables: Sequence[str],
+    coords: Sequence[Coords] | None = None,
+) -> Columns:
+    """Arrange query results as a table with a row per point and date.
+
+    `data` has shape `(points, len(variables), len(dates))`. Latitude and
+    longitude columns are added if `coords` are passed.
+    """
+
+    points, _, days = data.shape
+    columns: Columns = {}
+    if coords is not None:
+        latitude, longitude = np.array(coords, dtype=np.float64).T
+        columns['lat'] = np.repeat(latitude, days)
+        columns['lon'] = np.repeat(longitude, days)
+    columns['date'] = np.tile(dates, points)
+    for i, var in enumerate(variables):
+        columns[var] = data[:, i].reshape(-1)
+
+    return columns
+
+
+def write_npy(file: BinaryIO, columns: Columns) -> None:
+    """Write columns as a NumPy structured array. Missing values are NaN."""
+
+    table = np.empty(len(columns['date']), dtype=[(k, v.dtype) for k, v in columns.items()])
+    for name, column in columns.items():
+        table[name] = column
+    np.save(file, table, allow_pickle=False)
+
+
+def write_arrow(file: BinaryIO, columns: Columns) -> None:
+    """Write columns as an Arrow IPC stream. Missing values are nulls."""
+
+    try:
+        import pyarrow as pa
+    except ImportError as exc:
+        raise ArrowImportError from exc
+
+    arrays = [
+        pa.array(column, mask=np.isnan(column) if column.dtype == np.float32 else None)
+        for column in columns.values()
+    ]
+    table = pa.Table.from_arrays(arrays, names=list(columns))
+    with pa.ipc.new_stream(file, table.schema) as writer:
+        writer.write_table(table)
+
+
+BINARY_WRITERS: dict[str, Callable[[BinaryIO, Columns], None]] = {
+    'npy': write_npy,
+    'arrow': write_arrow,
+}
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from time import perf_counter
+from typing import TYPE_CHECKING, ClassVar
+
+from weatheasy import const
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+
+
+class Metric:
+    """A metric with values per combination of label values.
+
+    Values are kept in process memory, each worker process exposes its own.
+    """
+
+    type_: ClassVar[str]
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = Lock()
+        _REGISTRY.append(self)
+
+    def render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} {self.type_}'
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(labels[name] for name in self.labelnames)
+
+    def _format_labels(self, key: tuple[str, ...], **extra: str) -> str:
+        pairs = [*zip(self.labelnames, key, strict=True), *extra.items()]
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Counter(Metric):
+    type_ = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, /, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield f'{self.name}{self._format_labels(key)} {value}'
+
+
+class Histogram(Metric):
+    type_ = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Per labels: observation counts per bucket, the last one is +Inf, and their sum
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, /, **labels: str) -> None:
+        key = self._key(labels)
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            if (item := self._values.get(key)) is None:
+                item = self._values[key] = [0] * (len(self.buckets) + 1), [0.0]
+            item[0][bucket] += 1
+            item[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the time spent in the block, even if it raises."""
+
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start, **labels)
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        with self._lock:
+            values = [
+                (key, list(counts), total[0]) for key, (counts, total) in self._values.items()
+            ]
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts, strict=True):
+                cumulative += count
+                labels = self._format_labels(key, le=str(bound))
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            yield f'{self.name}_sum{self._format_labels(key)} {total}'
+            yield f'{self.name}_count{self._format_labels(key)} {cumulative}'
+
+
+def render() -> str:
+    """Render all metrics in the Prometheus text exposition format."""
+
+    return ''.join(f'{line}\n' for metric in _REGISTRY for line in metric.render())
+
+
+def get_array_labels(path: str) -> dict[str, str]:
+    """Get the dataset and the CFS2 branch (reanalysis, forecast, etc.) of an array by its path."""
+
+    dataset, _, rest = path.partition('/')
+    branch = rest.partition('/')[0] if dataset == const.CFS2_DIR else ''
+    return {'dataset': dataset, 'branch': branch}
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+_REGISTRY: list[Metric] = []
+
+STAGE_SECONDS = Histogram(
+    'weatheasy_stage_seconds',
+    'Time spent in query stages.',
+    ('dataset', 'branch', 'stage'),
+)
+STORE_READ_BYTES = Counter(
+    'weatheasy_store_read_bytes_total',
+    'Compressed chunk bytes read from the store.',
+    ('dataset', 'branch'),
+)
+CHUNK_CACHE_REQUESTS = Counter(
+    'weatheasy_chunk_cache_requests_total',
+    'Chunk cache lookups by result.',
+    ('dataset', 'branch', 'result'),
+)
+ROWS = Counter(
+    'weatheasy_rows_total',
+    'Rows sent in query responses.',
+    ('dataset',),
+)
+ERRORS = Counter(
+    'weatheasy_errors_total',
+    'Failed queries by exception type.',
+    ('dataset', 'type'),
+)
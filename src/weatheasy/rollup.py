@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import TYPE_CHECKING, Literal
+
+import numpy as np
+
+
+if TYPE_CHECKING:
+    from datetime import date
+
+    from numpy.typing import NDArray
+
+
+type Aggregation = Literal['day', 'pentad', 'month', 'year']
+type RollupLevel = Literal['pentad', 'month', 'year']
+
+AGGREGATIONS: tuple[Aggregation, ...] = 'day', 'pentad', 'month', 'year'
+ROLLUP_LEVELS: tuple[RollupLevel, ...] = 'pentad', 'month', 'year'
+
+_PENTADS = 73
+_FEB_29 = 59  # zero-based day of a leap year
+_EPOCH_YEAR = 1970
+
+
+def get_periods(
+    dates: NDArray[np.datetime64],
+    level: RollupLevel,
+    first_year: int,
+) -> NDArray[np.int64]:
+    """Get numbers of the periods of `dates` counted from the start of `first_year`.
+
+    A year has 73 pentads of five days, February 29 belongs to the pentad
+    of February 28.
+    """
+
+    years = dates.astype('datetime64[Y]')
+    year_numbers = years.astype(np.int64) - (first_year - _EPOCH_YEAR)
+    match level:
+        case 'year':
+            return year_numbers
+        case 'month':
+            months = dates.astype('datetime64[M]').astype(np.int64)
+            return months - (first_year - _EPOCH_YEAR) * 12
+        case 'pentad':
+            return year_numbers * _PENTADS + get_days_of_year(dates, leap=False) // 5
+
+
+def get_period_starts(
+    periods: NDArray[np.int64],
+    level: RollupLevel,
+    first_year: int,
+) -> NDArray[np.datetime64]:
+    """Get first dates of `periods` numbered like by `get_periods`."""
+
+    match level:
+        case 'year':
+            years = (periods + (first_year - _EPOCH_YEAR)).astype('datetime64[Y]')
+            return years.astype('datetime64[D]')
+        case 'month':
+            months = periods + (first_year - _EPOCH_YEAR) * 12
+            return months.astype('datetime64[M]').astype('datetime64[D]')
+        case 'pentad':
+            years = (periods // _PENTADS + (first_year - _EPOCH_YEAR)).astype('datetime64[Y]')
+            days = periods % _PENTADS * 5
+            days += _is_leap(years) & (days >= _FEB_29)
+            return years.astype('datetime64[D]') + days.astype('timedelta64[D]')
+
+
+def get_days_of_year(dates: NDArray[np.datetime64], *, leap: bool) -> NDArray[np.int64]:
+    """Get zero-based days of year of `dates` counted as in a leap or a common year.
+
+    Counted as in a leap year, March 1 is always the 60th day. Counted as in
+    a common year, February 29 is the same day as February 28.
+    """
+
+    years = dates.astype('datetime64[Y]')
+    days = (dates.astype('datetime64[D]') - years).astype(np.int64)
+    if leap:
+        return days + (~_is_leap(years) & (days >= _FEB_29))
+    return days - (_is_leap(years) & (days >= _FEB_29))
+
+
+def get_period_bounds(begin: date, end: date, aggregation: Aggregation) -> tuple[date, date]:
+    """Get the first date of the period of `begin` and the last date of the period of `end`."""
+
+    if aggregation == 'day':
+        return begin, end
+    first, last = get_periods(np.array([begin, end], 'datetime64[D]'), aggregation, begin.year)
+    starts = get_period_starts(np.array([first, last + 1]), aggregation, begin.year)
+    return starts[0].item(), starts[1].item() - timedelta(days=1)
+
+
+def get_period_dates(begin: date, end: date, aggregation: Aggregation) -> NDArray[np.datetime64]:
+    """Get first dates of `aggregation` periods from the one of `begin` to the one of `end`."""
+
+    if aggregation == 'day':
+        return np.arange(np.datetime64(begin, 'D'), np.datetime64(end, 'D') + 1)
+    first, last = get_periods(np.array([begin, end], 'datetime64[D]'), aggregation, begin.year)
+    return get_period_starts(np.arange(first, last + 1), aggregation, begin.year)
+
+
+def mean_periods(
+    data: NDArray[np.float32],
+    periods: NDArray[np.int64],
+    axis: int = -1,
+) -> NDArray[np.float32]:
+    """Average daily `data` over consecutive `periods` of its days along `axis`.
+
+    Missing values are skipped, a period without values is NaN.
+    """
+
+    starts = np.flatnonzero(np.diff(periods, prepend=periods[0] - 1))
+    valid = np.isfinite(data)
+    sums = np.add.reduceat(np.where(valid, data, 0), starts, axis=axis, dtype=np.float64)
+    counts = np.add.reduceat(valid, starts, axis=axis, dtype=np.int64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (sums / counts).astype(np.float32)
+
+
+def _is_leap(years: NDArray[np.datetime64]) -> NDArray[np.bool_]:
+    year = years.astype(np.int64) + _EPOCH_YEAR
+    return (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
@@ -1,25 +1,41 @@
 from __future__ import annotations
 
+import json
 from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
 from collections.abc import Callable
 from datetime import UTC, datetime
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import numpy as np
 import zarr
+from numcodecs import BitRound, Blosc
+from numpy.typing import NDArray
 
+from weatheasy import const
 from weatheasy.error import S3ImportError
 from weatheasy.version import __version__
 
 
+if TYPE_CHECKING:
+    from collections.abc import Mapping, MutableMapping
+
+    from weatheasy.const import Encoding
+
+
 type FormatFloat = Callable[[np.floating], str]
+# Pydantic evaluates this alias in the web settings, so `NDArray` is imported at runtime
+type FormatArray = Callable[[NDArray[np.float32]], NDArray[np.str_]]
+
+
+_MAX_EXACT_INTEGER = 2.0**24
 
 
 def utc_now() -> datetime:
     return datetime.now(tz=UTC)
 
 
-def get_storage(root: str) -> zarr.Group:
+def get_storage(root: str, *, consolidated: bool = False) -> zarr.Group:
     """Initialize zarr group.
 
     To work with S3 pass `root` in format `s3://<bucket>[/path]`.
@@ -30,19 +46,90 @@ def get_storage(root: str) -> zarr.Group:
     - AWS_SECRET_ACCESS_KEY
     - AWS_ENDPOINT_URL_S3
     - etc.
+
+    With `consolidated` the metadata written by `consolidate_metadata` is
+    read at once if it is up to date, such a group is read-only.
     """
 
+    store = get_store(root)
+    if consolidated and (group := open_consolidated(store, get_consolidated_stamp(store))):
+        return group
+    return zarr.group(store)
+
+
+def get_store(root: str) -> MutableMapping:
+    """Get a zarr store for `root` like `get_storage`."""
+
     if root.startswith('s3://'):
         try:
             import s3fs
         except ImportError as exc:
             raise S3ImportError from exc
         else:
-            store = s3fs.S3Map(root[5:], s3fs.S3FileSystem())
-    else:
-        store = root
+            return s3fs.S3Map(root[5:], s3fs.S3FileSystem())
+
+    # The store `zarr.group(root)` would open: a directory, a zip file, an fsspec URL, etc.
+    return zarr.storage.normalize_store_arg(root, mode='w')
+
+
+def consolidate_metadata(root: zarr.Group) -> None:
+    """Write metadata of all groups and arrays in `root` to a single key.
+
+    A new stamp is written first, so readers notice the update and can tell
+    whether the consolidated metadata includes it.
+    """
+
+    root.attrs[const.KEY_CONSOLIDATED] = utc_now().isoformat()
+    zarr.consolidate_metadata(root.store)
+
+
+def get_consolidated_stamp(store: MutableMapping) -> str | None:
+    """Read the stamp of the last consolidation right from `store`."""
+
+    try:
+        return json.loads(store['.zattrs']).get(const.KEY_CONSOLIDATED)
+    except KeyError:
+        return None
 
-    return zarr.group(store)
+
+def open_consolidated(store: MutableMapping, stamp: str | None) -> zarr.Group | None:
+    """Open `store` from consolidated metadata if it was consolidated with `stamp`.
+
+    None means the store has not been consolidated yet or is being
+    consolidated right now.
+    """
+
+    if stamp is None:
+        return None
+    try:
+        group = zarr.open_consolidated(store, mode='r')
+    except KeyError:
+        return None
+    if group.attrs.get(const.KEY_CONSOLIDATED) != stamp:
+        return None
+    return group
+
+
+def encoding_kwargs(encoding: Encoding) -> dict:
+    """Get `compressor` and `filters` arguments for creating zarr arrays with `encoding`."""
+
+    shuffle = Blosc.BITSHUFFLE if encoding.bitshuffle else Blosc.SHUFFLE
+    return {
+        'compressor': Blosc(encoding.cname, encoding.clevel, shuffle),
+        'filters': [BitRound(encoding.keepbits)] if encoding.keepbits < 23 else None,
+    }
+
+
+def get_cfs2_forecast_path(cfs2_attrs: Mapping[str, object]) -> str:
+    """Get the path of the current CFS2 forecast generation from attributes of the CFS2 group.
+
+    Forecasts stored before generations were introduced are right in the forecast group.
+    """
+
+    generation = cfs2_attrs.get(const.CFS2_KEY_FORECAST)
+    if generation is None:
+        return const.CFS2_FORECAST_DIR
+    return f'{const.CFS2_FORECAST_DIR}/{generation}'
 
 
 def init_parser(module: str = __package__) -> ArgumentParser:
@@ -72,3 +159,49 @@ def float_formatter_factory(nan: str, precision: int) -> FormatFloat:
         return np.format_float_positional(value, precision, trim='-')
 
     return impl
+
+
+def array_formatter_factory(nan: str, precision: int) -> FormatArray:
+    """Make a vectorized version of `float_formatter_factory`.
+
+    The result formats a whole float32 array at once, producing the same
+    strings as the scalar formatter for every element.
+    """
+
+    format_float = float_formatter_factory(nan, precision)
+    precision = int(precision)
+    scales = 10 ** np.arange(precision + 1)
+
+    def impl(values: NDArray[np.float32]) -> NDArray[np.str_]:
+        values = np.asarray(values, dtype=np.float32)
+        if not values.size:
+            return values.astype(str)
+        magnitude = np.abs(values)
+        regular = np.isfinite(values) & (magnitude < _MAX_EXACT_INTEGER)
+        # float32 multiplied by a power of ten up to 1e6 is exact in float64, so rint
+        # rounds to decimals exactly like format_float_positional does
+        exact = np.where(regular, magnitude, 0).astype(np.float64)
+
+        # The fewest decimals which round-trip give the shortest unique representation
+        digits = np.full(values.shape, precision)
+        for n in range(precision - 1, -1, -1):
+            rounded = np.rint(exact * scales[n]) / scales[n]
+            digits[rounded.astype(np.float32) == magnitude] = n
+        scaled = np.rint(exact * scales[digits]).astype(np.int64)
+        integer, fraction = np.divmod(scaled, scales[digits])
+        for _ in range(precision):
+            trailing = (digits > 0) & (fraction % 10 == 0)
+            fraction[trailing] //= 10
+            digits[trailing] -= 1
+
+        res = np.where(np.signbit(values), '-', '') + integer.astype(str)
+        fraction = '.' + np.strings.zfill(fraction.astype(str), digits)
+        res = np.where(digits > 0, res + fraction, res)
+        if not regular.all():
+            # Above 2**24 float32 shortest representations are shorter than the integer part
+            special = np.array([format_float(v) for v in values[~regular]])
+            res = res.astype(np.result_type(res, special))
+            res[~regular] = special
+        return res
+
+    return impl
@@ -1,11 +1,12 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, Response
 
 import weatheasy
 from . import controller as ctr, models as mls
 from .config import get_config
-from weatheasy.error import BaseValueError
+from weatheasy.error import BaseValueError, CFS2ClimatologyError
+from weatheasy.formats import MEDIA_TYPES
 from weatheasy.version import __version__
 
 
@@ -13,11 +14,20 @@ async def handle_value_error(_request: Request, err: BaseValueError) -> JSONResp
     return JSONResponse({'detail': str(err)}, 422)
 
 
+async def handle_climatology_error(_request: Request, err: CFS2ClimatologyError) -> JSONResponse:
+    # Normals are computed by downloads, anomalies are unavailable until then
+    return JSONResponse({'detail': str(err)}, 503)
+
+
+_DATA_RESPONSES: dict = {200: {'content': {media_type: {} for media_type in MEDIA_TYPES.values()}}}
+
+
 app = FastAPI(
     title='WeathEasy',
     version=__version__ or 'unknown',
     exception_handlers={
         BaseValueError: handle_value_error,
+        CFS2ClimatologyError: handle_climatology_error,
     },
 )
 
@@ -30,6 +40,10 @@ if get_config().enable_cors:
     )
 
 
+if get_config().enable_metrics:
+    app.add_api_route('/metrics', ctr.get_metrics, include_in_schema=False)
+
+
 @app.get('/variables', response_model=mls.Variables)
 def get_variables() -> mls.Variables:
     return ctr.get_variables()
@@ -39,15 +53,77 @@ def get_variables() -> mls.Variables:
     path='/cfs2',
     response_model=list[mls.CFS2DataItem],
     response_model_exclude_unset=True,
+    responses=_DATA_RESPONSES,
 )
-async def get_cfs2_data(query: mls.SFS2Query) -> StreamingResponse:
-    return await ctr.get_data(weatheasy.get_cfs2_data, query)
+async def get_cfs2_data(
+    query: mls.SFS2Query,
+    accept: mls.AcceptHeader = None,
+    if_none_match: mls.IfNoneMatchHeader = None,
+    if_modified_since: mls.IfModifiedSinceHeader = None,
+) -> Response:
+    return await ctr.get_data(
+        weatheasy.plan_cfs2_data_many, query, accept, if_none_match, if_modified_since
+    )
 
 
 @app.get(
     path='/cmip6',
     response_model=list[mls.CMIP6DataItem],
     response_model_exclude_unset=True,
+    responses=_DATA_RESPONSES,
+)
+async def get_cmip6_data(
+    query: mls.CMIP6Query,
+    accept: mls.AcceptHeader = None,
+    if_none_match: mls.IfNoneMatchHeader = None,
+    if_modified_since: mls.IfModifiedSinceHeader = None,
+) -> Response:
+    return await ctr.get_data(
+        weatheasy.plan_cmip6_data_many, query, accept, if_none_match, if_modified_since
+    )
+
+
+@app.post(
+    path='/cfs2/batch',
+    response_model=list[mls.CFS2BatchItem],
+    response_model_exclude_unset=True,
+    responses=_DATA_RESPONSES,
+)
+async def get_cfs2_batch_data(
+    query: mls.CFS2BatchQuery, accept: mls.AcceptHeader = None
+) -> Response:
+    return await ctr.get_batch_data(weatheasy.plan_cfs2_data_many, query, accept)
+
+
+@app.post(
+    path='/cmip6/batch',
+    response_model=list[mls.CMIP6BatchItem],
+    response_model_exclude_unset=True,
+    responses=_DATA_RESPONSES,
+)
+async def get_cmip6_batch_data(
+    query: mls.CMIP6BatchQuery, accept: mls.AcceptHeader = None
+) -> Response:
+    return await ctr.get_batch_data(weatheasy.plan_cmip6_data_many, query, accept)
+
+
+@app.post(
+    path='/cfs2/area',
+    response_model=list[mls.CFS2AreaItem],
+    response_model_exclude_unset=True,
+    responses=_DATA_RESPONSES,
+)
+async def get_cfs2_area_data(query: mls.CFS2AreaQuery, accept: mls.AcceptHeader = None) -> Response:
+    return await ctr.get_area_data(weatheasy.plan_cfs2_area_data, query, accept)
+
+
+@app.post(
+    path='/cmip6/area',
+    response_model=list[mls.CMIP6AreaItem],
+    response_model_exclude_unset=True,
+    responses=_DATA_RESPONSES,
 )
-async def get_cmip6_data(query: mls.CMIP6Query) -> StreamingResponse:
-    return await ctr.get_data(weatheasy.get_cmip6_data, query)
+async def get_cmip6_area_data(
+    query: mls.CMIP6AreaQuery, accept: mls.AcceptHeader = None
+) -> Response:
+    return await ctr.get_area_data(weatheasy.plan_cmip6_area_data, query, accept)
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from email.utils import format_datetime, parsedate_to_datetime
+from hashlib import blake2b
+from typing import TYPE_CHECKING, NamedTuple
+
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+
+class Validators(NamedTuple):
+    """Validators and freshness lifetime of a response."""
+
+    etag: str
+    last_modified: datetime | None
+    max_age: int
+
+    @property
+    def headers(self) -> dict[str, str]:
+        headers = {
+            'ETag': self.etag,
+            'Cache-Control': f'public, max-age={self.max_age}',
+            'Vary': 'Accept',
+        }
+        if self.last_modified is not None:
+            headers['Last-Modified'] = format_datetime(self.last_modified, usegmt=True)
+        return headers
+
+
+def make_etag(*parts: object) -> str:
+    """Make a strong entity tag from `parts` with stable representations."""
+
+    digest = blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def is_not_modified(
+    validators: Validators,
+    if_none_match: str | None,
+    if_modified_since: str | None,
+) -> bool:
+    """Evaluate conditional request headers of a GET request.
+
+    `If-Modified-Since` is ignored when `If-None-Match` is present, invalid
+    dates are ignored as well.
+    """
+
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return '*' in tags or validators.etag in tags
+
+    if if_modified_since is None or validators.last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return validators.last_modified.replace(microsecond=0) <= since
@@ -1,10 +1,18 @@
 from functools import cache, cached_property
 
 import zarr
-from pydantic import PositiveInt, computed_field
+from pydantic import NonNegativeFloat, NonNegativeInt, PositiveInt, computed_field
 from pydantic_settings import BaseSettings
 
-from weatheasy.util import FormatFloat, float_formatter_factory, get_storage
+from weatheasy.aio import AsyncChunkReader, get_chunk_reader
+from weatheasy.cache import (
+    DEFAULT_CACHE_SIZE,
+    DEFAULT_FETCH_WORKERS,
+    DEFAULT_METADATA_TTL,
+    ChunkCache,
+    MetadataCache,
+)
+from weatheasy.util import FormatArray, array_formatter_factory
 
 
 class Settings(BaseSettings):
@@ -18,16 +26,39 @@ class Settings(BaseSettings):
     data_root: str
     precision: PositiveInt = 6
     enable_cors: bool = False
+    enable_metrics: bool = False
+    chunk_cache_size: NonNegativeInt = DEFAULT_CACHE_SIZE
+    fetch_workers: PositiveInt = DEFAULT_FETCH_WORKERS
+    metadata_ttl: NonNegativeFloat = DEFAULT_METADATA_TTL
+    cfs2_max_age: NonNegativeInt = 3600
+    cmip6_max_age: NonNegativeInt = 604800
 
     @computed_field  # type: ignore[prop-decorator]
-    @cached_property
+    @property
     def storage(self) -> zarr.Group:
-        return get_storage(self.data_root)
+        """The storage group, its metadata may be reloaded on access."""
+
+        return self.metadata_cache.storage
+
+    @computed_field  # type: ignore[prop-decorator]
+    @cached_property
+    def metadata_cache(self) -> MetadataCache:
+        return MetadataCache(self.data_root, self.metadata_ttl)
+
+    @computed_field  # type: ignore[prop-decorator]
+    @cached_property
+    def chunk_cache(self) -> ChunkCache:
+        return ChunkCache(self.chunk_cache_size, self.fetch_workers)
+
+    @computed_field  # type: ignore[prop-decorator]
+    @cached_property
+    def chunk_reader(self) -> AsyncChunkReader | None:
+        return get_chunk_reader(self.data_root, self.fetch_workers)
 
     @computed_field  # type: ignore[prop-decorator]
     @cached_property
-    def format_float(self) -> FormatFloat:
-        return float_formatter_factory('null', self.precision)
+    def format_array(self) -> FormatArray:
+        return array_formatter_factory('null', self.precision)
 
 
 @cache
@@ -1,27 +1,65 @@
 from __future__ import annotations
 
-from io import StringIO
+from datetime import UTC, datetime, timedelta
+from functools import cache, partial
+from importlib.util import find_spec
+from io import BytesIO
+from time import perf_counter
 from typing import TYPE_CHECKING
 
 from anyio import to_thread
-from fastapi.responses import StreamingResponse
+from fastapi import HTTPException, status
+from fastapi.responses import Response, StreamingResponse
 
+from .conditional import Validators, is_not_modified, make_etag
 from .config import get_config
-from .models import DataQuery, Variables, VarInfo
-from weatheasy.const import CFS2_BANDS, CMIP6_VARS, ONE_DAY
+from .models import AreaQuery, BatchQuery, DataQuery, Variables, VarInfo
+from .singleflight import SingleFlight
+from weatheasy import (
+    const,
+    get_cfs2_cells,
+    get_cmip6_cells,
+    plan_cfs2_area_data,
+    plan_cfs2_data_many,
+    plan_cmip6_area_data,
+    plan_cmip6_data_many,
+)
+from weatheasy.const import CFS2_BANDS, CMIP6_VARS
+from weatheasy.formats import BINARY_WRITERS, MEDIA_TYPES, get_columns, iter_json_items
+from weatheasy.metrics import CONTENT_TYPE, ERRORS, ROWS, STAGE_SECONDS, render
+from weatheasy.rollup import get_period_dates
+from weatheasy.util import utc_now
+from weatheasy.version import __version__
 
 
 if TYPE_CHECKING:
-    from collections.abc import Callable, Sequence
-    from datetime import date
+    from collections.abc import Callable, Hashable, Iterable, Iterator, Sequence
+    from typing import BinaryIO
 
     import numpy as np
-    import zarr
     from numpy.typing import NDArray
 
-    from weatheasy.util import FormatFloat
+    from .config import Settings
+    from weatheasy import Coords, QueryPlan
+    from weatheasy.formats import Columns
+    from weatheasy.util import FormatArray
 
-    type Getter = Callable[..., NDArray[np.float32]]
+    type Planner = Callable[..., tuple[QueryPlan, NDArray[np.float32]]]
+
+
+_DATASETS: dict[Planner, str] = {
+    plan_cfs2_data_many: const.CFS2_DIR,
+    plan_cfs2_area_data: const.CFS2_DIR,
+    plan_cmip6_data_many: const.CMIP6_DIR,
+    plan_cmip6_area_data: const.CMIP6_DIR,
+}
+
+_GET_CELLS: dict[Planner, Callable[[Coords], Hashable]] = {
+    plan_cfs2_data_many: get_cfs2_cells,
+    plan_cmip6_data_many: get_cmip6_cells,
+}
+
+_in_flight: SingleFlight[NDArray[np.float32]] = SingleFlight()
 
 
 def get_variables() -> Variables:
@@ -31,44 +69,339 @@ def get_variables() -> Variables:
     )
 
 
-async def get_data(getter: Getter, query: DataQuery) -> StreamingResponse:
+def get_metrics() -> Response:
+    return Response(render(), media_type=CONTENT_TYPE)
+
+
+async def get_data(
+    planner: Planner,
+    query: DataQuery,
+    accept: str | None,
+    if_none_match: str | None,
+    if_modified_since: str | None,
+) -> Response:
+    """Respond with data of a point or with 304 if the client has it already.
+
+    Validators depend on the query and the dataset update stamp only, so
+    revalidation does not read data chunks.
+    """
+
+    format_ = _negotiate(accept)
+    cfg = get_config()
+    batch_query: BatchQuery = {**query, 'coords': [query['coords']]}
+    validators = await to_thread.run_sync(_get_validators, planner, batch_query, format_, cfg)
+    if is_not_modified(validators, if_none_match, if_modified_since):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators.headers)
+
+    data = await _exec_planner(planner, batch_query, cfg)
+    response = await _render(
+        format_, data, batch_query, cfg, dataset=_DATASETS[planner], batch=False
+    )
+    response.headers.update(validators.headers)
+    return response
+
+
+async def get_batch_data(planner: Planner, query: BatchQuery, accept: str | None) -> Response:
+    return await _respond(planner, query, accept, batch=True)
+
+
+async def get_area_data(planner: Planner, query: AreaQuery, accept: str | None) -> Response:
+    format_ = _negotiate(accept)
+    cfg = get_config()
+    data = await _exec_planner(planner, query, cfg)
+    # Every statistic of every variable is a column of a single point result
+    columns = [f'{var}_{stat}' for stat in query['stats'] for var in query['variables']]
+    return await _render(
+        format_,
+        data.reshape(1, len(columns), -1),
+        {
+            'coords': [],
+            'begin': query['begin'],
+            'end': query['end'],
+            'variables': columns,
+            'aggregation': 'day',
+        },
+        cfg,
+        dataset=_DATASETS[planner],
+        batch=False,
+    )
+
+
+async def _respond(
+    planner: Planner,
+    query: BatchQuery,
+    accept: str | None,
+    *,
+    batch: bool,
+) -> Response:
+    format_ = _negotiate(accept)
     cfg = get_config()
-    data = await to_thread.run_sync(_exec_getter, getter, query, cfg.storage)
-    content = _stream_data(data, query, cfg.format_float)
-    return StreamingResponse(content, media_type='application/json')
-
-
-def _exec_getter(getter: Getter, query: DataQuery, root: zarr.Group):
-    data = getter(**query, root=root)
-    return data.transpose()
-
-
-def _stream_data(data: NDArray[np.float32], query: DataQuery, format_float: FormatFloat):
-    sio = StringIO()
-    format_row = _row_formatter_factory(sio, query['variables'], format_float)
-    date_ = query['begin']
-    buf_size = 10240
-    sio.write('[')
-    format_row(date_, data[0])
-    for row in data[1:]:
-        date_ += ONE_DAY
-        sio.write(',')
-        format_row(date_, row)
-        pos = sio.tell()
-        if pos >= buf_size:
-            yield sio.getvalue()[:pos]
-            sio.seek(0)
-    sio.write(']')
-    yield sio.getvalue()[: sio.tell()]
-
-
-def _row_formatter_factory(sio: StringIO, variables: Sequence[str], format_float: FormatFloat):
-    def format_row(date_: date, row: NDArray[np.float32]):
-        sio.write('{')
-        for var, val in zip(variables, row, strict=False):
-            sio.write(f'"{var}":')
-            sio.write(format_float(val))
-            sio.write(',')
-        sio.write(f'"date":"{date_}"}}')
-
-    return format_row
+    data = await _exec_planner(planner, query, cfg)
+    return await _render(format_, data, query, cfg, dataset=_DATASETS[planner], batch=batch)
+
+
+async def _render(
+    format_: str,
+    data: NDArray[np.float32],
+    query: BatchQuery,
+    cfg: Settings,
+    *,
+    dataset: str,
+    batch: bool,
+) -> Response:
+    media_type = MEDIA_TYPES[format_]
+    dates = get_period_dates(query['begin'], query['end'], query['aggregation'])
+    ROWS.inc(len(data) * len(dates), dataset=dataset)
+    if write := BINARY_WRITERS.get(format_):
+        with STAGE_SECONDS.time(dataset=dataset, branch='', stage='serialize'):
+            columns = get_columns(
+                data, dates, query['variables'], query['coords'] if batch else None
+            )
+            content = await to_thread.run_sync(_write_binary, write, columns)
+        return Response(content, media_type=media_type)
+
+    if format_ == 'ndjson':
+        stream = _stream_ndjson(data, dates, query, cfg.format_array, batch=batch)
+    elif batch:
+        stream = _stream_batch_data(data, dates, query, cfg.format_array)
+    else:
+        stream = _stream_data(data[0], dates, query, cfg.format_array)
+    return StreamingResponse(_time_stream(stream, dataset), media_type=media_type)
+
+
+def _negotiate(accept: str | None) -> str:
+    """Choose a response format by the Accept header, JSON by default."""
+
+    if not accept:
+        return 'json'
+
+    media_ranges = []
+    for item in accept.split(','):
+        media_range, *params = (part.strip().lower() for part in item.split(';'))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0
+        media_ranges.append((quality, media_range))
+
+    media_ranges.sort(key=lambda r: r[0], reverse=True)
+    for quality, media_range in media_ranges:
+        if quality <= 0:
+            break
+        for format_, media_type in _served_media_types().items():
+            if media_range in (media_type, '*/*', media_type.split('/')[0] + '/*'):
+                return format_
+
+    detail = f'Supported media types: {", ".join(_served_media_types().values())}'
+    raise HTTPException(status.HTTP_406_NOT_ACCEPTABLE, detail)
+
+
+@cache
+def _served_media_types() -> dict[str, str]:
+    if find_spec('pyarrow') is None:
+        return {k: v for k, v in MEDIA_TYPES.items() if k != 'arrow'}
+    return MEDIA_TYPES
+
+
+async def _exec_planner(
+    planner: Planner, query: BatchQuery | AreaQuery, cfg: Settings
+) -> NDArray[np.float32]:
+    """Plan and execute a query, identical concurrent queries share a single execution.
+
+    Results are shared, so they must not be modified.
+    """
+
+    key = _query_key(planner, query)
+    return await _in_flight.do(key, partial(_run_planner, planner, query, cfg))
+
+
+def _query_key(planner: Planner, query: BatchQuery | AreaQuery) -> Hashable:
+    """Normalize `query`, so queries reading the same values have the same key.
+
+    Points are replaced with their grid cells.
+    """
+
+    get_cells = _GET_CELLS.get(planner)
+    key: list[Hashable] = [planner.__name__]
+    for name, value in sorted(query.items()):
+        if not isinstance(value, list):
+            key.append((name, value))
+        elif name == 'coords' and get_cells is not None:
+            key.append((name, tuple(map(get_cells, value))))
+        else:
+            key.append((name, tuple(value)))
+    return tuple(key)
+
+
+def _get_validators(planner: Planner, query: BatchQuery, format_: str, cfg: Settings) -> Validators:
+    last_modified, max_age = _FRESHNESS[planner](cfg)
+    # Precision and the version are included as they change the response body
+    etag = make_etag(__version__, last_modified, format_, cfg.precision, _query_key(planner, query))
+    return Validators(etag, last_modified, max_age)
+
+
+def _get_cfs2_freshness(cfg: Settings) -> tuple[datetime, int]:
+    """Get the time CFS2 values were last changed and how long they stay fresh.
+
+    Values change when the forecast is updated and at midnight UTC, when days
+    move from the forecast to the reanalysis.
+    """
+
+    now = utc_now()
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    cfs2_group = cfg.storage.get(const.CFS2_DIR)
+    cfs2_attrs = {} if cfs2_group is None else cfs2_group.attrs.asdict()
+    if generation := cfs2_attrs.get(const.CFS2_KEY_FORECAST):
+        format_ = const.CFS2_FORECAST_GENERATION_FORMAT
+        updated = datetime.strptime(generation, format_).replace(tzinfo=UTC)
+    elif updated_date := cfs2_attrs.get(const.CFS2_KEY_UPDATED):
+        # Forecasts stored before generations were introduced have only the date
+        updated = datetime.fromisoformat(updated_date).replace(tzinfo=UTC)
+    else:
+        updated = midnight
+    expires = midnight + timedelta(days=1) - now
+    return max(updated, midnight), min(cfg.cfs2_max_age, int(expires.total_seconds()))
+
+
+def _get_cmip6_freshness(cfg: Settings) -> tuple[None, int]:
+    """CMIP6 values do not change once downloaded."""
+
+    return None, cfg.cmip6_max_age
+
+
+_FRESHNESS: dict[Planner, Callable[[Settings], tuple[datetime | None, int]]] = {
+    plan_cfs2_data_many: _get_cfs2_freshness,
+    plan_cmip6_data_many: _get_cmip6_freshness,
+}
+
+
+async def _run_planner(
+    planner: Planner, query: BatchQuery | AreaQuery, cfg: Settings
+) -> NDArray[np.float32]:
+    dataset = _DATASETS[planner]
+    try:
+        with STAGE_SECONDS.time(dataset=dataset, branch='', stage='getter'):
+            plan, data = await to_thread.run_sync(_plan, planner, query, cfg)
+            if cfg.chunk_reader is None:
+                await to_thread.run_sync(plan.execute)
+            else:
+                await plan.execute_async(cfg.chunk_reader)
+    except Exception as err:
+        ERRORS.inc(dataset=dataset, type=type(err).__name__)
+        raise
+    return data
+
+
+def _plan(
+    planner: Planner, query: BatchQuery | AreaQuery, cfg: Settings
+) -> tuple[QueryPlan, NDArray[np.float32]]:
+    # The storage is accessed in a worker thread as it may reload metadata
+    with STAGE_SECONDS.time(dataset=_DATASETS[planner], branch='', stage='metadata'):
+        return planner(**query, root=cfg.storage, cache=cfg.chunk_cache)
+
+
+def _write_binary(write: Callable[[BinaryIO, Columns], None], columns: Columns) -> bytes:
+    buf = BytesIO()
+    write(buf, columns)
+    return buf.getvalue()
+
+
+def _stream_data(
+    data: NDArray[np.float32],
+    dates: NDArray[np.datetime64],
+    query: BatchQuery,
+    format_array: FormatArray,
+):
+    return _buffer(_stream_items(data, dates, query['variables'], format_array))
+
+
+def _stream_batch_data(
+    data: NDArray[np.float32],
+    dates: NDArray[np.datetime64],
+    query: BatchQuery,
+    format_array: FormatArray,
+):
+    def parts():
+        sep = '['
+        for coords, point_data in zip(query['coords'], data, strict=True):
+            yield f'{sep}{{"lat":{coords.latitude},"lon":{coords.longitude},"data":'
+            yield from _stream_items(point_data, dates, query['variables'], format_array)
+            sep = '},'
+        yield '}]'
+
+    return _buffer(parts())
+
+
+def _stream_ndjson(
+    data: NDArray[np.float32],
+    dates: NDArray[np.datetime64],
+    query: BatchQuery,
+    format_array: FormatArray,
+    *,
+    batch: bool,
+):
+    def parts():
+        prefix = '{'
+        for point_i, point_data in enumerate(data):
+            if batch:
+                coords = query['coords'][point_i]
+                prefix = f'{{"lat":{coords.latitude},"lon":{coords.longitude},'
+            for items in iter_json_items(
+                point_data, dates, query['variables'], format_array, prefix
+            ):
+                yield '\n'.join(items)
+                yield '\n'
+
+    return _buffer(parts())
+
+
+def _stream_items(
+    data: NDArray[np.float32],
+    dates: NDArray[np.datetime64],
+    variables: Sequence[str],
+    format_array: FormatArray,
+):
+    """Yield a JSON array of items formatted in blocks of rows, one item per date."""
+
+    yield '['
+    for i, items in enumerate(iter_json_items(data, dates, variables, format_array)):
+        if i:
+            yield ','
+        yield ','.join(items)
+    yield ']'
+
+
+def _time_stream(parts: Iterator[str], dataset: str):
+    """Yield `parts` recording the time spent producing them as serialization."""
+
+    elapsed = 0.0
+    try:
+        while True:
+            start = perf_counter()
+            part = next(parts, None)
+            elapsed += perf_counter() - start
+            if part is None:
+                return
+            yield part
+    finally:
+        STAGE_SECONDS.observe(elapsed, dataset=dataset, branch='', stage='serialize')
+
+
+def _buffer(parts: Iterable[str], size: int = 10240):
+    """Join small parts into chunks of at least `size` characters."""
+
+    buf: list[str] = []
+    buf_size = 0
+    for part in parts:
+        buf.append(part)
+        buf_size += len(part)
+        if buf_size >= size:
+            yield ''.join(buf)
+            buf.clear()
+            buf_size = 0
+    if buf:
+        yield ''.join(buf)
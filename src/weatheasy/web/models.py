@@ -1,15 +1,21 @@
 from datetime import date
 from enum import Enum
-from typing import Annotated, TypedDict
+from types import GenericAlias
+from typing import Annotated, NotRequired, TypedDict
 
-from fastapi import Depends, Query
+from fastapi import Depends, Header, Query
 from pydantic import BaseModel, Field, create_model
 
-from weatheasy import Coords, const
+from weatheasy import AREA_STATS, Area, AreaStat, Bounds, Coords, const
+from weatheasy.rollup import AGGREGATIONS, Aggregation
 
 
 CFS2Var = Enum('CFS2Var', {k: k for k in const.CFS2_BANDS})  # type: ignore[misc]
 CMIP6Var = Enum('CMIP6Var', {k: k for k in const.CMIP6_VARS})  # type: ignore[misc]
+AreaStatName = Enum('AreaStatName', {k: k for k in AREA_STATS})  # type: ignore[misc]
+AggregationName = Enum('AggregationName', {k: k for k in AGGREGATIONS})  # type: ignore[misc]
+
+_DEFAULT_AGGREGATION = AggregationName('day')
 
 
 class VarInfo(BaseModel):
@@ -27,6 +33,70 @@ class DataQuery(TypedDict):
     begin: date
     end: date
     variables: list[str]
+    aggregation: Aggregation
+    anomaly: NotRequired[bool]
+
+
+class BatchQuery(TypedDict):
+    coords: list[Coords]
+    begin: date
+    end: date
+    variables: list[str]
+    aggregation: Aggregation
+    anomaly: NotRequired[bool]
+
+
+class AreaQuery(TypedDict):
+    area: Area
+    begin: date
+    end: date
+    variables: list[str]
+    stats: list[AreaStat]
+
+
+class Point(BaseModel):
+    lat: float = Field(description='EPSG:4326', ge=-90, le=90, examples=[55.75222])
+    lon: float = Field(description='EPSG:4326', ge=-180, le=180, examples=[37.61556])
+
+
+class _BatchBody(BaseModel):
+    points: list[Point] = Field(min_length=1)
+    begin: date
+    end: date
+    aggregation: AggregationName = Field(
+        default=_DEFAULT_AGGREGATION, description='average over periods'
+    )
+
+
+class AreaBounds(BaseModel):
+    south: float = Field(description='EPSG:4326', ge=-90, le=90, examples=[55.5])
+    west: float = Field(description='EPSG:4326', ge=-180, le=180, examples=[37.3])
+    north: float = Field(description='EPSG:4326', ge=-90, le=90, examples=[56.0])
+    east: float = Field(description='EPSG:4326', ge=-180, le=180, examples=[37.9])
+
+
+class _AreaBody(BaseModel):
+    area: AreaBounds | list[Point] = Field(description='bounds or polygon vertices')
+    begin: date
+    end: date
+    stats: set[AreaStatName] = Field(default={AreaStatName('mean')}, min_length=1)
+
+
+class CFS2AreaBody(_AreaBody):
+    variables: set[CFS2Var] = Field(min_length=1)
+
+
+class CMIP6AreaBody(_AreaBody):
+    variables: set[CMIP6Var] = Field(min_length=1)
+
+
+class CFS2BatchBody(_BatchBody):
+    variables: set[CFS2Var] = Field(min_length=1)
+    anomaly: bool = Field(default=False, description='subtract daily normals')
+
+
+class CMIP6BatchBody(_BatchBody):
+    variables: set[CMIP6Var] = Field(min_length=1)
 
 
 def _query_base(
@@ -34,11 +104,15 @@ def _query_base(
     lon: Annotated[float, Query(description='EPSG:4326', ge=-90, le=90, example=37.61556)],
     begin: Annotated[date, Query()],
     end: Annotated[date, Query()],
+    aggregation: Annotated[
+        AggregationName, Query(description='average over periods')
+    ] = _DEFAULT_AGGREGATION,
 ):
     return {
         'coords': Coords(latitude=lat, longitude=lon),
         'begin': begin,
         'end': end,
+        'aggregation': aggregation.value,
     }
 
 
@@ -48,8 +122,11 @@ _QueryBase = Annotated[dict, Depends(_query_base)]
 def _cfs2_query(
     query: _QueryBase,
     variables: Annotated[set[CFS2Var], Query(alias='var')],
+    *,
+    anomaly: Annotated[bool, Query(description='subtract daily normals')] = False,
 ):
     query['variables'] = [v.value for v in variables]
+    query['anomaly'] = anomaly
     return query
 
 
@@ -61,15 +138,88 @@ def _cmip6_query(
     return query
 
 
+def _batch_query(body: CFS2BatchBody | CMIP6BatchBody) -> BatchQuery:
+    return {
+        'coords': [Coords(latitude=p.lat, longitude=p.lon) for p in body.points],
+        'begin': body.begin,
+        'end': body.end,
+        'variables': [v.value for v in body.variables],
+        'aggregation': body.aggregation.value,
+    }
+
+
+def _cfs2_batch_query(body: CFS2BatchBody) -> BatchQuery:
+    query = _batch_query(body)
+    query['anomaly'] = body.anomaly
+    return query
+
+
+def _cmip6_batch_query(body: CMIP6BatchBody) -> BatchQuery:
+    return _batch_query(body)
+
+
+def _area_query(body: CFS2AreaBody | CMIP6AreaBody) -> AreaQuery:
+    area: Area
+    if isinstance(body.area, AreaBounds):
+        area = Bounds(body.area.south, body.area.west, body.area.north, body.area.east)
+    else:
+        area = [Coords(latitude=p.lat, longitude=p.lon) for p in body.area]
+    stats = {s.value for s in body.stats}
+    return {
+        'area': area,
+        'begin': body.begin,
+        'end': body.end,
+        'variables': [v.value for v in body.variables],
+        'stats': [s for s in AREA_STATS if s in stats],
+    }
+
+
+def _cfs2_area_query(body: CFS2AreaBody) -> AreaQuery:
+    return _area_query(body)
+
+
+def _cmip6_area_query(body: CMIP6AreaBody) -> AreaQuery:
+    return _area_query(body)
+
+
 def _data_item(name: str, variables: type[Enum]):
     field_definitions: dict = {k.value: (DecimalField | None, None) for k in variables}
     field_definitions['date_'] = DateField, ...
     return create_model(name, **field_definitions)
 
 
+def _area_item(name: str, variables: type[Enum]):
+    field_definitions: dict = {
+        f'{k.value}_{stat}': (DecimalField | None, None) for k in variables for stat in AREA_STATS
+    }
+    field_definitions['date_'] = DateField, ...
+    return create_model(name, **field_definitions)
+
+
+def _batch_item(name: str, data_item: type[BaseModel]):
+    # Same as `list[data_item]`, which mypy rejects as `data_item` is a variable
+    field_definitions: dict = {
+        'lat': (float, ...),
+        'lon': (float, ...),
+        'data': (GenericAlias(list, data_item), ...),
+    }
+    return create_model(name, **field_definitions)
+
+
+AcceptHeader = Annotated[str | None, Header()]
+IfNoneMatchHeader = Annotated[str | None, Header(include_in_schema=False)]
+IfModifiedSinceHeader = Annotated[str | None, Header(include_in_schema=False)]
 SFS2Query = Annotated[DataQuery, Depends(_cfs2_query)]
 CMIP6Query = Annotated[DataQuery, Depends(_cmip6_query)]
+CFS2BatchQuery = Annotated[BatchQuery, Depends(_cfs2_batch_query)]
+CMIP6BatchQuery = Annotated[BatchQuery, Depends(_cmip6_batch_query)]
+CFS2AreaQuery = Annotated[AreaQuery, Depends(_cfs2_area_query)]
+CMIP6AreaQuery = Annotated[AreaQuery, Depends(_cmip6_area_query)]
 DateField = Annotated[date, Field(alias='date')]
 DecimalField = Annotated[float | None, Field()]
 CFS2DataItem = _data_item('CFS2DataItem', CFS2Var)
 CMIP6DataItem = _data_item('CMIP6DataItem', CMIP6Var)
+CFS2BatchItem = _batch_item('CFS2BatchItem', CFS2DataItem)
+CMIP6BatchItem = _batch_item('CMIP6BatchItem', CMIP6DataItem)
+CFS2AreaItem = _area_item('CFS2AreaItem', CFS2Var)
+CMIP6AreaItem = _area_item('CMIP6AreaItem', CMIP6Var)
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+from weakref import WeakKeyDictionary
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Coroutine, Hashable
+    from typing import Any
+
+
+class SingleFlight[T]:
+    """Run a single call per key at once, concurrent callers with the same key share its result.
+
+    The call runs in its own task, so it is not cancelled when some callers
+    go away. Exceptions are raised to every caller.
+    """
+
+    def __init__(self) -> None:
+        self._calls: WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[Hashable, asyncio.Task[T]]
+        ] = WeakKeyDictionary()
+
+    async def do(self, key: Hashable, func: Callable[[], Coroutine[Any, Any, T]]) -> T:
+        loop = asyncio.get_running_loop()
+        calls = self._calls.setdefault(loop, {})
+        if (task := calls.get(key)) is None:
+            task = calls[key] = loop.create_task(func())
+            task.add_done_callback(lambda t: _forget(calls, key, t))
+        return await asyncio.shield(task)
+
+
+def _forget(calls: dict[Hashable, asyncio.Task], key: Hashable, task: asyncio.Task) -> None:
+    if calls.get(key) is task:
+        del calls[key]
+    if not task.cancelled():
+        # Mark the exception retrieved even if every caller has gone away
+        task.exception()
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+
+from weatheasy import const
+from weatheasy.download import _get_size
+from weatheasy.util import get_storage
+
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import zarr
+
+
+# The reanalysis of `data_root` ends with this day, later days are the forecast
+LAST_DATE = date(2012, 12, 31)
+
+
+@pytest.fixture
+def data_root(tmp_path: Path) -> str:
+    """Create a local store with empty CFS2 reanalysis arrays."""
+
+    root = get_storage(str(tmp_path))
+    group = root.require_group(const.CFS2_REANALYSIS_DIR)
+    height, width = _get_size(const.CFS2_REANALYSIS_RESOLUTION[0], const.CFS2_REANALYSIS_BBOX)
+    days = (LAST_DATE - const.CFS2_REANALYSIS_FIRST_DATE).days + 1
+    for var in const.CFS2_BANDS:
+        group.create_dataset(
+            name=var,
+            shape=(days, height, width),
+            dtype=np.float32,
+            chunks=(days, 100, 100),
+            fill_value=np.nan,
+        )
+    updated = LAST_DATE + const.ONE_DAY + const.CFS2_REANALYSIS_LAST_DATE_OFFSET
+    root[const.CFS2_DIR].attrs[const.CFS2_KEY_UPDATED] = updated.isoformat()
+    return str(tmp_path)
+
+
+@pytest.fixture
+def storage(data_root: str) -> zarr.Group:
+    return get_storage(data_root)
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+
+from weatheasy import Bounds, Coords, get_cfs2_area_data
+from weatheasy.cache import ChunkCache
+
+
+if TYPE_CHECKING:
+    import zarr
+
+    from weatheasy import Area
+
+
+_BEGIN = date(2012, 1, 1)
+
+
+def _band(north: float, south: float) -> float:
+    return np.sin(np.radians(north)) - np.sin(np.radians(south))
+
+
+@pytest.mark.parametrize(
+    'area',
+    [
+        Bounds(89, 0, 91, 1),
+        [Coords(89, 0), Coords(91, 0), Coords(91, 1), Coords(89, 1)],
+    ],
+)
+def test_area_touching_pole(storage: zarr.Group, area: Area) -> None:
+    array = storage['cfs2/reanalysis/TMP']
+    day = (_BEGIN - date(2011, 4, 1)).days
+    # Rows of the cells nearest to the pole and columns of longitudes 0.25 and 0.75
+    array[day, :3, 361:363] = np.repeat([[10], [0], [0]], 2, axis=1)
+
+    res = get_cfs2_area_data(
+        root=storage,
+        begin=_BEGIN,
+        end=_BEGIN,
+        area=area,
+        variables=['TMP'],
+        stats=['mean', 'min', 'max'],
+        cache=ChunkCache(),
+    )
+
+    weights = [_band(90, 89.75), _band(89.75, 89.25), _band(89.25, 88.75)]
+    assert res[:, 0, 0] == pytest.approx([10 * weights[0] / sum(weights), 0, 10], rel=1e-5)
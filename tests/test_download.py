@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import groupby
+from threading import Thread
+from typing import TYPE_CHECKING
+
+import pytest
+from requests import Session
+
+from weatheasy import const
+from weatheasy.download import (
+    _CFS2_REANALYSIS_MESSAGES,
+    _Cfs2ReanalysisDownloader,
+    _get_message_ranges,
+)
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+
+# Messages of a fake reanalysis file, the last one is used by downloads
+_MESSAGES = [bytes([i % 256]) * (10 + i) for i in range(1, _CFS2_REANALYSIS_MESSAGES[-1] + 1)]
+_OFFSETS = [sum(map(len, _MESSAGES[:i])) for i in range(len(_MESSAGES))]
+_INVENTORY = ''.join(
+    f'{i}:{offset}:d=2012010100:VAR:anl:\n' for i, offset in enumerate(_OFFSETS, 1)
+)
+
+
+class _Server(ThreadingHTTPServer):
+    """Serve `_MESSAGES` as any GRIB file and `inventory` as its .idx."""
+
+    inventory = _INVENTORY
+    ranges: list[str | None]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: _Server
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path.endswith('.idx'):
+            body = self.server.inventory.encode()
+            self.send_response(200)
+        elif range_ := self.headers.get('Range'):
+            self.server.ranges.append(range_)
+            begin, end = range_.removeprefix('bytes=').split('-')
+            body = b''.join(_MESSAGES)[int(begin) : int(end) + 1 if end else None]
+            self.send_response(206)
+        else:
+            self.server.ranges.append(None)
+            body = b''.join(_MESSAGES)
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch: pytest.MonkeyPatch) -> Iterator[_Server]:
+    server = _Server(('127.0.0.1', 0), _Handler)
+    server.ranges = []
+    thread = Thread(target=server.serve_forever)
+    thread.start()
+    monkeypatch.setattr(
+        _Cfs2ReanalysisDownloader, '_base_url', f'http://127.0.0.1:{server.server_port}/'
+    )
+    yield server
+    server.shutdown()
+    thread.join()
+    server.server_close()
+
+
+def test_message_ranges() -> None:
+    inventory = '1:0:a\n2:10:b\n3:25:c\n4:40:d\n5:60:e\n'
+
+    assert _get_message_ranges(inventory, [1, 2, 4]) == [(0, 25), (40, 60)]
+    assert _get_message_ranges(inventory, [3, 4, 5]) == [(25, None)]
+    assert _get_message_ranges(inventory, [6]) is None
+    assert _get_message_ranges('1:0:a\n3:10:b\n', [1]) is None
+    assert _get_message_ranges('<html>\n', [1]) is None
+
+
+def test_download_message_ranges(server: _Server, tmp_path: Path) -> None:
+    downloader = _Cfs2ReanalysisDownloader(Session(), tmp_path)
+
+    [(_, paths)] = downloader(date(2012, 1, 1), 1)
+
+    # Adjacent messages are requested at once, the last range lasts up to the end of the file
+    runs = [
+        [message for _, message in run]
+        for _, run in groupby(enumerate(_CFS2_REANALYSIS_MESSAGES), lambda x: x[1] - x[0])
+    ]
+    ranges = [f'bytes={_OFFSETS[run[0] - 1]}-{_OFFSETS[run[-1]] - 1}' for run in runs[:-1]]
+    ranges.append(f'bytes={_OFFSETS[runs[-1][0] - 1]}-')
+    assert server.ranges == ranges * len(const.CFS2_HHS)
+    assert paths is not None
+    for path in paths:
+        assert path.read_bytes() == b''.join(_MESSAGES[m - 1] for m in _CFS2_REANALYSIS_MESSAGES)
+
+
+def test_download_whole_file(server: _Server, tmp_path: Path) -> None:
+    server.inventory = 'not an inventory\n'
+    downloader = _Cfs2ReanalysisDownloader(Session(), tmp_path)
+
+    [(_, paths)] = downloader(date(2012, 1, 1), 1)
+
+    assert server.ranges == [None] * len(const.CFS2_HHS)
+    assert paths is not None
+    for path in paths:
+        assert path.read_bytes() == b''.join(_MESSAGES)
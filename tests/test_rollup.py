@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from weatheasy.climatology import get_day_slots
+from weatheasy.rollup import get_periods
+
+
+@pytest.mark.parametrize('year', [1900, 2000, 2023, 2024])
+def test_days_around_february_29(year: int) -> None:
+    dates = np.arange(np.datetime64(f'{year}-02-24'), np.datetime64(f'{year}-03-03'))
+    leap = len(dates) == 8
+
+    # Slots are counted as in a leap year, pentads as in a common one
+    assert get_day_slots(dates).tolist() == [54, 55, 56, 57, 58, *[59] * leap, 60, 61]
+    assert get_periods(dates, 'pentad', year).tolist() == [10, *[11] * (5 + leap), 12]
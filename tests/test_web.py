@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from weatheasy import const
+from weatheasy.climatology import DAY_SLOTS
+from weatheasy.util import get_storage
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+_CFS2_QUERY = {
+    'lat': 55.75,
+    'lon': 37.6,
+    'begin': '2012-01-01',
+    'end': '2012-01-10',
+    'var': 'TMP',
+    'anomaly': 'true',
+}
+
+
+@pytest.fixture
+def client(data_root: str, monkeypatch: pytest.MonkeyPatch) -> Iterator[TestClient]:
+    monkeypatch.setenv('WEATHEASY__DATA_ROOT', data_root)
+    # The application reads settings on import
+    from weatheasy.web import app
+    from weatheasy.web.config import get_config
+
+    get_config.cache_clear()
+
+    with TestClient(app) as client:
+        yield client
+    get_config.cache_clear()
+
+
+def test_anomaly_without_climatology(client: TestClient) -> None:
+    response = client.get('/cfs2', params=_CFS2_QUERY)
+
+    assert response.status_code == 503
+    assert response.json() == {'detail': 'CFS2 climatology not found'}
+
+
+def test_anomaly_without_climatology_of_variable(client: TestClient, data_root: str) -> None:
+    group = get_storage(data_root).require_group(const.CFS2_CLIMATOLOGY_DIR)
+    group.create_dataset('mean/TMAX', shape=(DAY_SLOTS, 361, 720), dtype=np.float32)
+
+    response = client.get('/cfs2', params=_CFS2_QUERY)
+
+    assert response.status_code == 503
+    assert response.json() == {'detail': 'CFS2 climatology of TMP not found'}
+
+
+def test_metrics_disabled_by_default(client: TestClient) -> None:
+    assert client.get('/metrics').status_code == 404